@@ -0,0 +1 @@
+python3 bench/suite.py "$@"
@@ -0,0 +1,60 @@
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import BlockType
+from utils import block_to_block_type
+
+
+def regex_block_to_block_type(block):
+    # The classifier as it was before the dispatch table, kept for comparison.
+    heading_regex = r"^#{1,6} .*"
+    code_regex = r"^`{3}(.|\n)*`{3}$"
+    quote_regex = r"^>.*"
+    unordered_list_regex = r"^[\-\*] .*"
+    lines = block.split("\n")
+    if re.fullmatch(heading_regex, block):
+        return BlockType.HEADING
+    if re.fullmatch(code_regex, block):
+        return BlockType.CODE
+    if all(re.search(quote_regex, line) for line in lines):
+        return BlockType.QUOTE
+    if all([line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)]):
+        return BlockType.ORDERED_LIST
+    if all(re.search(unordered_list_regex, line) for line in lines):
+        return BlockType.UNORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    makers = [
+        lambda: "#" * rng.randint(1, 6) + " A heading",
+        lambda: "Some paragraph text that goes on for a while.\nAnd a second line.",
+        lambda: "```\n" + "\n".join(f"code line {i}" for i in range(rng.randint(5, 2000))) + "\n```",
+        lambda: "\n".join(f"> quoted line {i}" for i in range(rng.randint(1, 10))),
+        lambda: "\n".join(f"{i}. item" for i in range(1, rng.randint(2, 30))),
+        lambda: "\n".join(f"* item {i}" for i in range(rng.randint(1, 30))),
+        lambda: "1. not\n3. ordered",
+        lambda: "```unterminated " + "x" * rng.randint(10, 5000),
+    ]
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+def main():
+    corpus = make_corpus(2000)
+    for block in corpus:
+        assert block_to_block_type(block) == regex_block_to_block_type(block), block
+    size = sum(len(block) for block in corpus)
+    old = min(timeit.repeat(lambda: [regex_block_to_block_type(b) for b in corpus], number=3, repeat=3)) / 3
+    new = min(timeit.repeat(lambda: [block_to_block_type(b) for b in corpus], number=3, repeat=3)) / 3
+    print(f"{len(corpus)} blocks ({size / 1e6:.1f} MB)  regex {old * 1000:8.2f} ms  "
+          f"dispatch {new * 1000:8.2f} ms  speedup {old / new:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
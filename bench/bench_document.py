@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusGenerator
+from document import parse_document
+from utils import extract_title, markdown_to_html_node
+
+REPEAT = 20
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def separate(markdown):
+    return extract_title(markdown), markdown_to_html_node(markdown)
+
+
+def merged(markdown):
+    document = parse_document(markdown.split("\n"))
+    return document.title, document.node
+
+
+def main():
+    generator = CorpusGenerator(pages=1, blocks_per_page=20000)
+    # The title is the first line, so extract_title's cost is the split of
+    # the whole document, not the search.
+    markdown = generator.page(0)
+    print(f"document: {len(markdown) / 1e6:.1f} MB")
+    assert separate(markdown)[0] == merged(markdown)[0]
+    # Interleaved so that machine noise hits both sides alike.
+    before = after = float("inf")
+    for _ in range(REPEAT):
+        before = min(before, timed(lambda: separate(markdown)))
+        after = min(after, timed(lambda: merged(markdown)))
+    print(f"extract_title + markdown_to_html_node {before * 1000:9.2f} ms")
+    print(f"parse_document                        {after * 1000:9.2f} ms")
+    title_only = min(timed(lambda: extract_title(markdown)) for _ in range(REPEAT))
+    print(f"  of which extract_title              {title_only * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import html
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusGenerator
+from htmlnode import LeafNode, escape_text
+from utils import markdown_to_html_node
+
+REPEAT = 5
+
+
+def unescaped_leaf_to_html(self):
+    # LeafNode.to_html as it was before escaping moved into the serializer.
+    if self.value is None:
+        raise ValueError("leaf nodes must have a value")
+    if (not isinstance(self.tag, str)):
+        return self.value
+    props = "" if not self.props else " " + " ".join(f'{k}="{v}"' for k, v in self.props.items())
+    return f"<{self.tag}{props}>{self.value}</{self.tag}>"
+
+
+def best(func):
+    seconds = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def main():
+    generator = CorpusGenerator(pages=200)
+    markdowns = [generator.page(i) for i in range(200)]
+    nodes = [markdown_to_html_node(md) for md in markdowns]
+
+    escaping_to_html = LeafNode.to_html
+    LeafNode.to_html = unescaped_leaf_to_html
+    try:
+        # The old path: serialize, then escape text in a separate pass. A
+        # real post-processing pass also has to parse the HTML back apart,
+        # so this is a lower bound on what it cost.
+        old = best(lambda: [html.escape(node.to_html(), quote=False) for node in nodes])
+        unescaped = best(lambda: [node.to_html() for node in nodes])
+    finally:
+        LeafNode.to_html = escaping_to_html
+    new = best(lambda: [node.to_html() for node in nodes])
+
+    print(f"to_html, no escaping          {unescaped * 1000:8.2f} ms")
+    print(f"to_html + escaping pass       {old * 1000:8.2f} ms")
+    print(f"to_html, escaping built in    {new * 1000:8.2f} ms")
+
+    samples = {
+        "short": "Hello, world",
+        "long plain": "lorem ipsum dolor sit amet " * 40,
+        "needs escaping": "if a < b && b > c: print('<tag>') " * 10,
+    }
+    for name, text in samples.items():
+        seconds = best(lambda: [escape_text(text) for _ in range(100000)])
+        print(f"escape_text {name:<17} {seconds * 1000:8.2f} ms / 100k")
+
+
+if __name__ == "__main__":
+    main()
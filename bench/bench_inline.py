@@ -0,0 +1,42 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from utils import (split_nodes_delimiter, split_nodes_image, split_nodes_link,
+                   text_to_textnodes)
+
+
+def five_stage_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def long_paragraph(sentences):
+    parts = []
+    for i in range(sentences):
+        parts.append(f"Sentence {i} has **bold {i}** and *italic* words, some `code_{i}` "
+                     f"and an ![image {i}](/images/{i}.png) next to [link {i}](/pages/{i}).")
+    return " ".join(parts)
+
+
+def main():
+    for sentences in (10, 100, 1000):
+        text = long_paragraph(sentences)
+        assert text_to_textnodes(text) == five_stage_text_to_textnodes(text)
+        number = max(1, 2000 // sentences)
+        old = min(timeit.repeat(lambda: five_stage_text_to_textnodes(text), number=number, repeat=5))
+        new = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=5))
+        print(f"{len(text):>8} chars  five-stage {old / number * 1000:8.3f} ms  "
+              f"single-pass {new / number * 1000:8.3f} ms  speedup {old / new:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
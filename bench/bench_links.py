@@ -0,0 +1,41 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from utils import split_nodes_image, split_nodes_link
+
+# Linear scaling gives a ratio near 10 between 10k and 1k links; the old
+# split-per-link implementation was around 100.
+MAX_SCALING_RATIO = 25
+
+
+def link_block(count, image=False):
+    prefix = "!" if image else ""
+    return " ".join(f"{prefix}[link {i}](/pages/{i}.html)" for i in range(count))
+
+
+def best_time(func, text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    return min(timeit.repeat(lambda: func(nodes), number=1, repeat=5))
+
+
+def main():
+    failed = False
+    for name, func, image in (("split_nodes_link", split_nodes_link, False),
+                              ("split_nodes_image", split_nodes_image, True)):
+        small = best_time(func, link_block(1000, image))
+        large = best_time(func, link_block(10000, image))
+        ratio = large / small
+        print(f"{name:<18} 1k links {small * 1000:7.2f} ms  10k links {large * 1000:7.2f} ms  "
+              f"ratio {ratio:5.1f}")
+        if ratio > MAX_SCALING_RATIO:
+            print(f"{name} no longer scales linearly (ratio {ratio:.1f} > {MAX_SCALING_RATIO})")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
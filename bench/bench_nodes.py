@@ -0,0 +1,74 @@
+import os
+import resource
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from htmlnode import LeafNode
+from textnode import TextNode, TextType
+from utils import markdown_to_html_node
+
+NODE_COUNT = 100000
+
+
+class DictTextNode:
+    # TextNode as it was before __slots__, kept for comparison.
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictLeafNode:
+    # LeafNode as it was before __slots__ (attributes set via HTMLNode.__init__).
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+def bytes_per_node(factory):
+    text = "shared text"
+    tracemalloc.start()
+    nodes = [factory(text) for _ in range(NODE_COUNT)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    # The list itself costs 8 bytes per entry; report the node objects only.
+    return size / NODE_COUNT - 8
+
+
+def sample_markdown(sections):
+    parts = ["# Memory benchmark"]
+    for i in range(sections):
+        parts.append(f"## Section {i}")
+        parts.append(f"Paragraph {i} with **bold**, *italic*, `code` and a [link](/p/{i}).")
+        parts.append("\n".join(f"* item {j} with *emphasis*" for j in range(10)))
+    return "\n\n".join(parts)
+
+
+def main():
+    rows = [
+        ("TextNode", lambda t: DictTextNode(t, TextType.TEXT), lambda t: TextNode(t, TextType.TEXT)),
+        ("LeafNode", lambda t: DictLeafNode("b", t), lambda t: LeafNode("b", t)),
+    ]
+    for name, before, after in rows:
+        old = bytes_per_node(before)
+        new = bytes_per_node(after)
+        print(f"{name:<9} __dict__ {old:6.1f} B/node  __slots__ {new:6.1f} B/node  saved {1 - new / old:4.0%}")
+
+    markdown = sample_markdown(5000)
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del node
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"markdown_to_html_node on {len(markdown) / 1e6:.1f} MB: traced peak {peak / 1e6:.1f} MB, "
+          f"process max RSS {rss:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
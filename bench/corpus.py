@@ -0,0 +1,130 @@
+import argparse
+import os
+import random
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 5,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+WORDS = ("elf dwarf ring shire mordor gondor rohan wizard hobbit river mountain "
+         "forest tower road journey fellowship king return shadow light").split()
+
+
+class CorpusGenerator:
+    def __init__(self, pages=100, depth=2, blocks_per_page=20, block_mix=None,
+                 link_density=0.1, code_block_lines=10, seed=0):
+        self.pages = pages
+        self.depth = depth
+        self.blocks_per_page = blocks_per_page
+        self.block_mix = block_mix or DEFAULT_BLOCK_MIX
+        self.link_density = link_density
+        self.code_block_lines = code_block_lines
+        self.rng = random.Random(seed)
+
+    def words(self, count):
+        parts = []
+        for _ in range(count):
+            roll = self.rng.random()
+            word = self.rng.choice(WORDS)
+            if roll < self.link_density:
+                parts.append(f"[{word}](/{self.rng.choice(WORDS)}/{self.rng.randrange(self.pages)})")
+            elif roll < self.link_density + 0.05:
+                parts.append(f"**{word}**")
+            elif roll < self.link_density + 0.10:
+                parts.append(f"*{word}*")
+            elif roll < self.link_density + 0.13:
+                parts.append(f"`{word}`")
+            else:
+                parts.append(word)
+        return " ".join(parts)
+
+    def block(self, block_type):
+        match block_type:
+            case "paragraph":
+                return "\n".join(self.words(12) for _ in range(self.rng.randint(1, 4)))
+            case "heading":
+                return "#" * self.rng.randint(2, 6) + " " + self.words(4)
+            case "unordered_list":
+                return "\n".join(f"* {self.words(6)}" for _ in range(self.rng.randint(2, 8)))
+            case "ordered_list":
+                return "\n".join(f"{i}. {self.words(6)}" for i in range(1, self.rng.randint(2, 9)))
+            case "quote":
+                return "\n".join(f"> {self.words(8)}" for _ in range(self.rng.randint(1, 4)))
+            case "code":
+                lines = [f"line_{i} = {self.rng.choice(WORDS)}()" for i in range(self.code_block_lines)]
+                return "```\n" + "\n".join(lines) + "\n```"
+        raise ValueError(f"unknown block type {block_type}")
+
+    def page(self, index):
+        types = list(self.block_mix)
+        weights = [self.block_mix[t] for t in types]
+        blocks = [f"# Page {index} {self.words(3)}"]
+        for block_type in self.rng.choices(types, weights, k=self.blocks_per_page):
+            blocks.append(self.block(block_type))
+        return "\n\n".join(blocks) + "\n"
+
+    def page_path(self, index):
+        parts = [f"d{(index // 10 ** level) % 10}" for level in range(self.depth, 0, -1)]
+        return os.path.join(*parts, f"page{index}.md") if parts else f"page{index}.md"
+
+    def write(self, root, static_files=20, static_size=64 * 1024):
+        content_dir = os.path.join(root, "content")
+        static_dir = os.path.join(root, "static")
+        for index in range(self.pages):
+            path = os.path.join(content_dir, self.page_path(index))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(self.page(index))
+        for index in range(static_files):
+            path = os.path.join(static_dir, "assets", f"file{index}.bin")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(self.rng.randbytes(static_size))
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, "w") as f:
+            f.write("<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>\n")
+        return content_dir, static_dir, template_path
+
+
+def parse_block_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, weight = item.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--blocks-per-page", type=int, default=20)
+    parser.add_argument("--block-mix", type=parse_block_mix, default=None,
+                        help="weights such as paragraph=5,code=1,quote=1")
+    parser.add_argument("--link-density", type=float, default=0.1,
+                        help="fraction of words that are links")
+    parser.add_argument("--code-block-lines", type=int, default=10)
+    parser.add_argument("--static-files", type=int, default=20)
+    parser.add_argument("--static-size", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def generator_from_args(args):
+    return CorpusGenerator(args.pages, args.depth, args.blocks_per_page, args.block_mix,
+                           args.link_density, args.code_block_lines, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic content tree")
+    parser.add_argument("root")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    generator_from_args(args).write(args.root, args.static_files, args.static_size)
+
+
+if __name__ == "__main__":
+    main()
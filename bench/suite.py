@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from copy_file import copy_from_source_to_dest
+from corpus import add_corpus_arguments, generator_from_args
+from generate import find_pages, generate_pages_recursive
+from textnode import BlockType
+from utils import block_to_block_type, markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+
+
+def tree_size(root):
+    total = 0
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            total += os.path.getsize(os.path.join(dir_path, file_name))
+    return total
+
+
+class Suite:
+    def __init__(self, root, content_dir, static_dir, template_path, repeat):
+        self.root = root
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.repeat = repeat
+        self.markdowns = []
+        for content_path, _ in find_pages(content_dir, "public"):
+            with open(content_path) as f:
+                self.markdowns.append(f.read())
+        self.markdown_bytes = sum(len(md.encode()) for md in self.markdowns)
+        self.paragraphs = [" ".join(block.split("\n")) for md in self.markdowns
+                           for block in markdown_to_blocks(md)
+                           if block_to_block_type(block) == BlockType.PARAGRAPH]
+        self.nodes = [markdown_to_html_node(md) for md in self.markdowns]
+        self.static_bytes = tree_size(static_dir)
+        self.results = {}
+
+    def measure(self, name, func, setup=None, pages=None, size=None):
+        seconds = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        best = min(seconds)
+        result = {"seconds": best, "peak_mb": peak / 1e6}
+        if pages is not None:
+            result["pages_per_s"] = pages / best
+        if size is not None:
+            result["mb_per_s"] = size / 1e6 / best
+        self.results[name] = result
+        return result
+
+    def fresh_dir(self, name):
+        path = os.path.join(self.root, name)
+        return lambda: shutil.rmtree(path, ignore_errors=True)
+
+    def run(self):
+        paragraph_bytes = sum(len(p.encode()) for p in self.paragraphs)
+        self.measure("text_to_textnodes", lambda: [text_to_textnodes(p) for p in self.paragraphs],
+                     size=paragraph_bytes)
+        self.measure("markdown_to_html_node", lambda: [markdown_to_html_node(md) for md in self.markdowns],
+                     pages=len(self.markdowns), size=self.markdown_bytes)
+        self.measure("to_html", lambda: [node.to_html() for node in self.nodes],
+                     pages=len(self.nodes), size=self.markdown_bytes)
+
+        public = os.path.join(self.root, "public")
+
+        def generate():
+            with redirect_stdout(StringIO()):
+                generate_pages_recursive(self.content_dir, self.template_path, public)
+
+        self.measure("generate_pages_recursive", generate, setup=self.fresh_dir("public"),
+                     pages=len(self.markdowns), size=self.markdown_bytes)
+        static_public = os.path.join(self.root, "static_public")
+        self.measure("copy_from_source_to_dest",
+                     lambda: copy_from_source_to_dest(self.static_dir, static_public),
+                     setup=self.fresh_dir("static_public"), size=self.static_bytes)
+        return self.results
+
+
+def setup_differences(report, baseline):
+    # Timings are only comparable between runs of the same corpus and
+    # settings; --threshold only decides what counts as a regression.
+    differences = []
+    for section in ("args", "corpus"):
+        ours = {k: v for k, v in report[section].items() if k != "threshold"}
+        theirs = {k: v for k, v in baseline.get(section, {}).items() if k != "threshold"}
+        for key in sorted(ours.keys() | theirs.keys()):
+            if ours.get(key) != theirs.get(key):
+                differences.append(f"{section}.{key}: {theirs.get(key)!r} -> {ours.get(key)!r}")
+    return differences
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["seconds"]
+        change = result["seconds"] / before - 1
+        marker = ""
+        if change > threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(f"  {name:<26} {before * 1000:10.2f} ms -> {result['seconds'] * 1000:10.2f} ms "
+              f"({change:+.1%}){marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the build on a synthetic corpus")
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="./.cache/bench/results.json",
+                        help="where the JSON results are written")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown (as a fraction) that counts as a regression")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, static_dir, template_path = generator_from_args(args).write(
+            root, args.static_files, args.static_size)
+        suite = Suite(root, content_dir, static_dir, template_path, args.repeat)
+        results = suite.run()
+        corpus = {
+            "pages": len(suite.markdowns),
+            "markdown_bytes": suite.markdown_bytes,
+            "static_bytes": suite.static_bytes,
+        }
+
+    for name, result in results.items():
+        throughput = []
+        if "pages_per_s" in result:
+            throughput.append(f"{result['pages_per_s']:9.1f} pages/s")
+        if "mb_per_s" in result:
+            throughput.append(f"{result['mb_per_s']:8.2f} MB/s")
+        print(f"{name:<26} {result['seconds'] * 1000:10.2f} ms  {'  '.join(throughput):<32} "
+              f"peak {result['peak_mb']:8.2f} MB")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "corpus": corpus,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        differences = setup_differences(report, baseline)
+        if len(differences) > 0:
+            print(f"Not comparing with {args.baseline}, it was run on a different setup:", file=sys.stderr)
+            for difference in differences:
+                print(f"  {difference}", file=sys.stderr)
+            return 2
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if len(regressions) > 0:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import asyncio
+import io
+from functools import partial
+from document import parse_document
+from generate import index_page, page_key
+from htmlnode import RawNode
+from links import locate_links
+from output import open_output
+from plan import stat_template
+from search import count_terms
+from template import load_template
+
+
+def _read_page(path, parse_cache=None):
+    # Runs in a reader thread, off the event loop. With a parse cache, the
+    # page is read once for both its cache key and, on a miss, its lines.
+    # Returns (cache key, cached (title, body) or None, lines or None).
+    if parse_cache is None:
+        with open(path, "r") as f:
+            return None, None, f.readlines()
+    with open(path, "rb") as f:
+        data = f.read()
+    key = parse_cache.key_for_data(data)
+    cached = parse_cache.get(key)
+    if cached is not None:
+        return key, cached, None
+    # Decoded the way open(path, "r") would, newlines included.
+    return key, None, io.TextIOWrapper(io.BytesIO(data)).readlines()
+
+
+def _write_page(path, text, parse_cache=None, entry=None):
+    with open_output(path) as f:
+        f.write(text)
+    if entry is not None:
+        parse_cache.put(*entry)
+
+
+async def build_pages_async(pages, template_path, concurrency=16, manifest=None, block_cache=None,
+                            template_stat=None, parse_cache=None, search_index=None, link_index=None):
+    # Reads and writes run in worker threads while parsing stays on the
+    # event loop, so reading page N+1 and writing page N-1 overlap with
+    # parsing page N. The bounded queues stop readers from running ahead
+    # of the parser (and the parser ahead of the writers).
+    if concurrency < 1:
+        # Queue(0) is unbounded and no reader or writer would start.
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    if template_stat is None:
+        template_stat = stat_template(template_path)
+    template = load_template(template_path, template_stat)
+    parse_queue = asyncio.Queue(concurrency)
+    write_queue = asyncio.Queue(concurrency)
+    errors = []
+
+    jobs = []
+    for job in pages:
+        key = None
+        if manifest is not None:
+            key = page_key(manifest, job.source_path, template_path, job.stat, template_stat)
+            if manifest.is_fresh(job.dest_path, key):
+                continue
+        jobs.append((job, key))
+    pending = iter(jobs)
+
+    async def read():
+        for job, key in pending:
+            try:
+                page = await asyncio.to_thread(_read_page, job.source_path, parse_cache)
+            except Exception as e:
+                errors.append((job.source_path, f"{type(e).__name__}: {e}"))
+                continue
+            await parse_queue.put((job, key, page))
+
+    async def parse():
+        while (item := await parse_queue.get()) is not None:
+            job, key, (cache_key, cached, lines) = item
+            print(f"Generate page from {job.source_path} to {job.dest_path} using {template_path}")
+            entry = None
+            terms = None
+            links = None
+            try:
+                if cached is not None:
+                    title, content = cached[0], RawNode(cached[1])
+                else:
+                    if search_index is not None:
+                        terms = {}
+                    if link_index is not None:
+                        links = []
+                    on_text = None if terms is None else partial(count_terms, terms=terms)
+                    on_links = None if links is None else partial(locate_links, found=links)
+                    document = parse_document(lines, block_cache, on_text=on_text, on_links=on_links)
+                    title, content = document.title, document.node
+                    if parse_cache is not None:
+                        entry = (cache_key, title, content.to_html())
+                        content = RawNode(entry[2])
+                output = template.render({"Title": title, "Content": content})
+            except Exception as e:
+                errors.append((job.source_path, f"{type(e).__name__}: {e}"))
+                continue
+            await write_queue.put((job, key, output, entry, (title, terms, links)))
+
+    async def write():
+        while (item := await write_queue.get()) is not None:
+            job, key, output, entry, page = item
+            try:
+                await asyncio.to_thread(_write_page, job.dest_path, output, parse_cache, entry)
+            except Exception as e:
+                errors.append((job.source_path, f"{type(e).__name__}: {e}"))
+                continue
+            index_page(job, page, search_index, link_index)
+            if manifest is not None:
+                manifest.record(job.dest_path, [job.source_path, template_path], key)
+
+    readers = [asyncio.create_task(read()) for _ in range(concurrency)]
+    parser = asyncio.create_task(parse())
+    writers = [asyncio.create_task(write()) for _ in range(concurrency)]
+    await asyncio.gather(*readers)
+    await parse_queue.put(None)
+    await parser
+    for _ in writers:
+        await write_queue.put(None)
+    await asyncio.gather(*writers)
+    return errors
+
+
+def generate_pages_async(pages, template_path, concurrency=16, manifest=None, block_cache=None,
+                         template_stat=None, parse_cache=None, search_index=None, link_index=None):
+    return asyncio.run(build_pages_async(pages, template_path, concurrency, manifest, block_cache,
+                                         template_stat, parse_cache, search_index, link_index))
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from document import node_links, page_text
+from htmlnode import RawNode
+from utils import block_to_block_type, block_to_html_node
+
+
+class CachedBlock(RawNode):
+    # A rendered block with its text (see page_text) and links (see
+    # node_links), so a page can be indexed without rendering it again.
+    __slots__ = ("texts", "links")
+
+    def __init__(self, html, texts, links):
+        super().__init__(html)
+        self.texts = texts
+        self.links = links
+
+
+class BlockCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # (block, block type) -> (html, texts, links)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, block):
+        block_type = block_to_block_type(block)
+        key = (block, block_type)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        node = block_to_html_node(block, block_type)
+        entry = (node.to_html(), tuple(page_text(node)), tuple(node_links(node)))
+        self.put(key, entry)
+        return entry
+
+    def render(self, block):
+        return self.lookup(block)[0]
+
+    def node(self, block):
+        return CachedBlock(*self.lookup(block))
+
+    def entry_size(self, key, entry):
+        # Sizes are counted in characters, which is close enough to bytes
+        # for bounding memory.
+        html, texts, links = entry
+        return len(key[0]) + len(html) + sum(map(len, texts)) + sum(len(url) for _, url in links)
+
+    def put(self, key, entry):
+        entry_size = self.entry_size(key, entry)
+        if entry_size > self.max_bytes:
+            return
+        self.entries[key] = entry
+        self.size += entry_size
+        while self.size > self.max_bytes:
+            evicted = self.entries.popitem(last=False)
+            self.size -= self.entry_size(*evicted)
+            self.evictions += 1
+
+    def summary(self):
+        return (f"Block cache: {self.hits} hit(s), {self.misses} miss(es), "
+                f"{self.evictions} evicted, {len(self.entries)} block(s) held")
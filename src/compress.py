@@ -0,0 +1,141 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from output import open_output
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map"}
+# Below this the sibling is rarely worth a request header's worth of bytes.
+MIN_COMPRESS_SIZE = 256
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# (name, file suffix, compress function). gzip is always there; zstd and
+# brotli are used when the interpreter or an optional package provides them.
+ENCODINGS = [("gzip", ".gz", _gzip)]
+
+try:
+    from compression import zstd
+
+    def _zstd(data):
+        return zstd.compress(data, level=19)
+
+    ENCODINGS.append(("zstd", ".zst", _zstd))
+except ImportError:
+    try:
+        import zstandard
+
+        def _zstd(data):
+            return zstandard.ZstdCompressor(level=19).compress(data)
+
+        ENCODINGS.append(("zstd", ".zst", _zstd))
+    except ImportError:
+        pass
+
+try:
+    import brotli
+
+    def _brotli(data):
+        return brotli.compress(data, quality=11)
+
+    ENCODINGS.append(("br", ".br", _brotli))
+except ImportError:
+    pass
+
+
+class CompressStats:
+    def __init__(self):
+        self.compressed = 0
+        self.unchanged = 0
+        self.not_smaller = 0
+        self.bytes_in = {}
+        self.bytes_out = {}
+
+    def add(self, name, size_in, size_out):
+        self.compressed += 1
+        self.bytes_in[name] = self.bytes_in.get(name, 0) + size_in
+        self.bytes_out[name] = self.bytes_out.get(name, 0) + size_out
+
+    def summary(self):
+        parts = [f"Precompressed {self.compressed} file(s)"]
+        for name, size_in in self.bytes_in.items():
+            size_out = self.bytes_out[name]
+            parts.append(f"{name} {size_in / 1e6:.2f} MB -> {size_out / 1e6:.2f} MB "
+                         f"({size_out / size_in:.1%})")
+        parts.append(f"{self.unchanged} unchanged")
+        parts.append(f"{self.not_smaller} not smaller")
+        return ", ".join(parts)
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def compress_file(path, encodings):
+    with open(path, "rb") as f:
+        data = f.read()
+    results = []
+    for name, suffix, compress in encodings:
+        compressed = compress(data)
+        sibling_path = path + suffix
+        if len(compressed) >= len(data):
+            # An older, smaller version may have left a sibling behind that
+            # no longer matches.
+            if os.path.exists(sibling_path):
+                os.remove(sibling_path)
+            results.append((name, suffix, len(data), None))
+            continue
+        with open_output(sibling_path, "wb") as f:
+            f.write(compressed)
+        results.append((name, suffix, len(data), len(compressed)))
+    return results
+
+
+def precompress_outputs(paths, manifest=None, workers=None, stats=None, encodings=None, digests=None):
+    # manifest is keyed on each output's content hash, so outputs that a
+    # build left untouched are not compressed again. digests holds the
+    # [size, mtime_ns, sha256] of outputs hashed while they were written
+    # (see OutputWriter), which are then not read again to hash them.
+    if encodings is None:
+        encodings = ENCODINGS
+    if stats is None:
+        stats = CompressStats()
+    jobs = []
+    for path in paths:
+        if not is_compressible(path):
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if stat.st_size < MIN_COMPRESS_SIZE:
+            continue
+        key = None
+        pending = encodings
+        if manifest is not None:
+            digest = None if digests is None else digests.get(path)
+            if digest is not None and digest[0] == stat.st_size and digest[1] == stat.st_mtime_ns:
+                manifest.record_input(path, stat, digest[2])
+            key = manifest.input_hash(path, stat)
+            pending = [e for e in encodings if not manifest.is_fresh(path + e[1], key)]
+            stats.unchanged += len(encodings) - len(pending)
+        if len(pending) > 0:
+            jobs.append((path, key, pending))
+
+    # zlib (and zstd/brotli) release the GIL while compressing, so threads
+    # are enough to use every core here.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda job: compress_file(job[0], job[2]), jobs)
+        for (path, key, _), file_results in zip(jobs, results):
+            for name, suffix, size_in, size_out in file_results:
+                if manifest is not None:
+                    # A sibling that was not smaller is recorded too, so the
+                    # output is not compressed again until it changes.
+                    manifest.record(path + suffix, [path], key, exists=size_out is not None)
+                if size_out is None:
+                    stats.not_smaller += 1
+                    continue
+                stats.add(name, size_in, size_out)
+    return stats
@@ -1,17 +1,156 @@
 import os
 import shutil
+from manifest import file_hash
+from output import output_writer
+from plan import BuildPlan
 
-def copy_from_source_to_dest(source_dir, dest_dir):
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request number for FICLONE (reflink) on Linux.
+FICLONE = 0x40049409
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.methods = {}
+
+    def add_copied(self, size, method):
+        self.copied_files += 1
+        self.copied_bytes += size
+        self.methods[method] = self.methods.get(method, 0) + 1
+
+    def add_skipped(self, size):
+        self.skipped_files += 1
+        self.skipped_bytes += size
+
+    def summary(self):
+        methods = ", ".join(f"{method}: {count}" for method, count in sorted(self.methods.items()))
+        text = (f"Copied {self.copied_files} static file(s) ({self.copied_bytes / 1e6:.2f} MB), "
+                f"skipped {self.skipped_files} unchanged ({self.skipped_bytes / 1e6:.2f} MB)")
+        if methods != "":
+            text += f" [{methods}]"
+        return text
+
+
+def is_unchanged(source_path, dest_path, checksum=False, source_stat=None):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if source_stat is None:
+        source_stat = os.stat(source_path)
+    if (source_stat.st_dev, source_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        return True
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if checksum:
+        return file_hash(source_path) == file_hash(dest_path)
+    return source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def _reflink(source_f, dest_f, size):
+    if fcntl is None:
+        raise OSError("reflink is not supported on this platform")
+    fcntl.ioctl(dest_f.fileno(), FICLONE, source_f.fileno())
+
+
+def _copy_file_range(source_f, dest_f, size):
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source_f.fileno(), dest_f.fileno(), size - copied)
+        if count == 0:
+            break
+        copied += count
+
+
+def _sendfile(source_f, dest_f, size):
+    copied = 0
+    while copied < size:
+        count = os.sendfile(dest_f.fileno(), source_f.fileno(), copied, size - copied)
+        if count == 0:
+            break
+        copied += count
+
+
+FAST_COPY_METHODS = [
+    ("reflink", _reflink),
+    ("copy_file_range", _copy_file_range),
+    ("sendfile", _sendfile),
+]
+
+
+def fast_copy(source_path, dest_path, hardlink=False, source_stat=None):
+    # The copy lands in a temp file that is renamed over the destination, so
+    # readers never see a partial file and an old hardlink to the source is
+    # replaced rather than written through.
+    tmp_path = output_writer.temp_path(dest_path)
+    try:
+        method = _copy_to(source_path, tmp_path, hardlink, source_stat)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    return method
+
+
+def _copy_to(source_path, dest_path, hardlink, source_stat):
+    if hardlink:
+        try:
+            os.link(source_path, dest_path)
+            return "hardlink"
+        except OSError:
+            pass
+
+    if source_stat is None:
+        source_stat = os.stat(source_path)
+    size = source_stat.st_size
+    with open(source_path, "rb") as source_f, open(dest_path, "wb") as dest_f:
+        for method, copy in FAST_COPY_METHODS:
+            try:
+                copy(source_f, dest_f, size)
+                break
+            except (OSError, AttributeError):
+                # Not supported here (platform, filesystem or kernel), so
+                # start over with the next method.
+                source_f.seek(0)
+                dest_f.seek(0)
+                dest_f.truncate()
+        else:
+            shutil.copyfileobj(source_f, dest_f, 1 << 20)
+            method = "copy"
+    os.chmod(dest_path, source_stat.st_mode & 0o7777)
+    os.utime(dest_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    return method
+
+
+def copy_from_source_to_dest(source_dir, dest_dir, manifest=None, checksum=False, hardlink=False, stats=None):
     if not os.path.isdir(source_dir):
-        raise Exception(f"Invalid source directory: {dest_dir}")
-    
-    if not os.path.exists(dest_dir):
-        os.mkdir(dest_dir)
-
-    for entry in os.listdir(source_dir):
-        source_path = os.path.join(source_dir, entry)
-        dest_path = os.path.join(dest_dir, entry)
-        if os.path.isfile(source_path):
-            shutil.copy(source_path, dest_path)
+        raise Exception(f"Invalid source directory: {source_dir}")
+
+    plan = BuildPlan()
+    plan.add_static(source_dir, dest_dir)
+    plan.make_dest_dirs()
+    copy_planned_files(plan.static_files, manifest, checksum, hardlink, stats)
+
+
+def copy_planned_files(files, manifest=None, checksum=False, hardlink=False, stats=None):
+    for job in files:
+        size = job.stat.st_size
+        if is_unchanged(job.source_path, job.dest_path, checksum, job.stat):
+            if stats is not None:
+                stats.add_skipped(size)
         else:
-            copy_from_source_to_dest(source_path, dest_path)
+            method = fast_copy(job.source_path, job.dest_path, hardlink, job.stat)
+            if stats is not None:
+                stats.add_copied(size, method)
+        if manifest is not None:
+            # Recorded only so that manifest.prune() can remove the
+            # output once its source is deleted.
+            manifest.record(job.dest_path, [job.source_path], "static")
@@ -0,0 +1,277 @@
+import argparse
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import unquote, urlsplit, urlunsplit
+from document import parse_document
+from template import load_template
+
+COMPRESSIBLE_TYPES = {"application/javascript", "application/json", "image/svg+xml", "application/xml"}
+# Compressing tiny bodies costs more than the bytes it saves.
+MIN_GZIP_SIZE = 512
+
+
+def is_compressible(content_type):
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def accepts_gzip(header):
+    for coding in (header or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip().replace(" ", "")
+            return q not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class Resource:
+    __slots__ = ("body", "gzip_body", "content_type", "etag", "mtime")
+
+    def __init__(self, body, content_type, mtime):
+        self.body = body
+        # Compressed once up front and cached along with the body.
+        self.gzip_body = None
+        if is_compressible(content_type.split(";")[0]) and len(body) >= MIN_GZIP_SIZE:
+            self.gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.mtime = mtime
+
+    def size(self):
+        return len(self.body) + (0 if self.gzip_body is None else len(self.gzip_body))
+
+
+class Redirect:
+    # A directory index asked for without its trailing slash.
+    __slots__ = ()
+
+
+class SiteRenderer:
+    def __init__(self, content_dir, static_dir, template_path, max_bytes=64 * 1024 * 1024):
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.max_bytes = max_bytes
+        # path -> (validator, Resource), least recently used first
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, url_path):
+        # Maps a URL onto content/ or static/ the way a build lays out
+        # public/: content/a/b.md is /a/b.html, content/a/index.md is /a/.
+        # Like http.server, /a is a "redirect" to /a/, so relative links on
+        # the index resolve against its directory.
+        parts = [p for p in unquote(url_path).split("/") if p not in ("", ".")]
+        if ".." in parts:
+            return None, None
+        static_path = os.path.join(self.static_dir, *parts)
+        if os.path.isfile(static_path):
+            return "static", static_path
+        rel_path = os.path.join(*parts) if parts else ""
+        candidates = [os.path.join(self.content_dir, rel_path, "index.md")]
+        if rel_path.endswith(".html"):
+            candidates.insert(0, os.path.join(self.content_dir, rel_path[:-5] + ".md"))
+        for content_path in candidates:
+            if os.path.isfile(content_path):
+                if content_path == candidates[-1] and parts and not url_path.endswith("/"):
+                    return "redirect", content_path
+                return "page", content_path
+        return None, None
+
+    def get(self, url_path):
+        kind, path = self.find(url_path)
+        if kind is None:
+            return None
+        if kind == "redirect":
+            return Redirect()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        validator = (stat.st_mtime_ns, stat.st_size)
+        if kind == "page":
+            template_stat = os.stat(self.template_path)
+            validator += (template_stat.st_mtime_ns, template_stat.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == validator:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        if kind == "page":
+            resource = self.render_page(path, max(stat.st_mtime, template_stat.st_mtime))
+        else:
+            resource = self.load_static(path, stat.st_mtime)
+        self.put(path, validator, resource)
+        return resource
+
+    def render_page(self, content_path, mtime):
+        with open(content_path, "r") as f:
+            document = parse_document(f)
+        html = load_template(self.template_path).render({
+            "Title": document.title,
+            "Content": document.node,
+        })
+        return Resource(html.encode("utf-8"), "text/html; charset=utf-8", mtime)
+
+    def load_static(self, static_path, mtime):
+        with open(static_path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(static_path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        return Resource(body, content_type, mtime)
+
+    def put(self, path, validator, resource):
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= old[1].size()
+            if resource.size() > self.max_bytes:
+                return
+            self.entries[path] = (validator, resource)
+            self.size += resource.size()
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted.size()
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections give their pool thread back after this.
+    timeout = 5
+    renderer = None
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        try:
+            resource = self.renderer.get(urlsplit(self.path).path)
+        except Exception as e:
+            self.send_plain(500, f"Failed to render {self.path}: {type(e).__name__}: {e}\n", send_body)
+            return
+        if resource is None:
+            self.send_plain(404, f"{self.path} not found\n", send_body)
+            return
+        if isinstance(resource, Redirect):
+            parts = urlsplit(self.path)
+            self.send_response(301)
+            self.send_header("Location", urlunsplit(("", "", parts.path + "/", parts.query, parts.fragment)))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = resource.body
+        etag = resource.etag
+        use_gzip = resource.gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding"))
+        if use_gzip:
+            body = resource.gzip_body
+            etag = etag[:-1] + '-gz"'
+
+        if self.not_modified(etag, resource.mtime):
+            self.send_response(304)
+            self.send_validators(etag, resource.mtime)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_validators(etag, resource.mtime)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_validators(self, etag, mtime):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def send_plain(self, code, text, send_body):
+        body = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    # Like ThreadingHTTPServer, but requests run on a fixed pool of threads
+    # instead of a new thread each.
+    def __init__(self, address, handler, workers=8):
+        super().__init__(address, handler)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def make_server(renderer, port, workers=8, host=""):
+    handler = type("Handler", (DevRequestHandler,), {"renderer": renderer})
+    return ThreadPoolHTTPServer((host, port), handler, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the site straight from content/ and static/")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--workers", type=int, default=8, help="request handler threads")
+    parser.add_argument("--cache-mb", type=int, default=64,
+                        help="least recently used rendered pages are dropped above this size")
+    args = parser.parse_args(argv)
+
+    renderer = SiteRenderer("./content", "./static", "./template.html", args.cache_mb * 1024 * 1024)
+    server = make_server(renderer, args.port, args.workers)
+    print(f"Serving content/ and static/ on http://localhost:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import itertools
+import re
+from htmlnode import LeafNode, ParentNode, RawNode
+from textnode import BlockType, TextType
+from utils import HEADING_RE, block_to_block_type, block_to_html_node, iter_numbered_blocks, text_to_textnodes
+
+SLUG_RE = re.compile(r"\w+")
+
+
+def slugify(text):
+    return "-".join(SLUG_RE.findall(text.lower())) or "section"
+
+
+class Heading:
+    __slots__ = ("level", "text", "slug")
+
+    def __init__(self, level, text, slug):
+        self.level = level
+        self.text = text
+        self.slug = slug
+
+    def __repr__(self):
+        return f"Heading({self.level}, {self.text}, {self.slug})"
+
+    def __eq__(self, other):
+        return (self.level == other.level
+                and self.text == other.text
+                and self.slug == other.slug)
+
+
+class Document:
+    __slots__ = ("node", "title", "headings", "block_count", "word_count")
+
+    def __init__(self, node, title, headings, block_count, word_count):
+        self.node = node
+        self.title = title
+        self.headings = headings
+        self.block_count = block_count
+        self.word_count = word_count
+
+    def table_of_contents(self, min_level=2, max_level=6):
+        # Nested <ul> lists linking to each heading's slug; the links only
+        # resolve when the document was parsed with heading_ids=True.
+        root = ParentNode("ul", [])
+        stack = [(min_level - 1, root)]
+        for heading in self.headings:
+            if not min_level <= heading.level <= max_level:
+                continue
+            # A heading nests under the nearest shallower one, even when
+            # levels are skipped.
+            while stack[-1][0] >= heading.level:
+                stack.pop()
+            item = ParentNode("li", [LeafNode("a", heading.text, {"href": f"#{heading.slug}"})])
+            stack[-1][1].children.append(item)
+            sublist = ParentNode("ul", [])
+            item.children.append(sublist)
+            stack.append((heading.level, sublist))
+        _drop_empty_lists(root)
+        return root
+
+
+def _drop_empty_lists(node):
+    for child in node.children:
+        if isinstance(child, ParentNode):
+            _drop_empty_lists(child)
+    node.children = [child for child in node.children
+                     if not (child.tag == "ul" and len(child.children) == 0)]
+
+
+def page_text(node):
+    # The leaves are the TextNodes from text_to_textnodes, one for one, so
+    # this is the page's text as the renderer saw it.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(reversed(node.children))
+        elif node.tag == "img":
+            yield node.props["alt"]
+        elif isinstance(node, LeafNode):
+            yield node.value
+
+
+# tag -> the prop holding its URL
+LINK_PROPS = {"a": "href", "img": "src"}
+
+
+def node_links(node):
+    # (tag, url) for every link and image, in document order.
+    links = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(reversed(node.children))
+            continue
+        prop = LINK_PROPS.get(node.tag)
+        if prop is not None:
+            links.append((node.tag, node.props[prop]))
+    return links
+
+
+def heading_text(node, block, level):
+    # The heading's leaves already hold its inline text; a cached heading
+    # is a RawNode, so its text is lexed again (headings are short).
+    if isinstance(node, ParentNode):
+        text = "".join(child.value for child in node.children)
+    else:
+        text = "".join(text_node.text for text_node in text_to_textnodes(block[level + 1:])
+                       if text_node.text_type != TextType.IMAGE)
+    return text.replace("\n", " ")
+
+
+def block_title(block):
+    # The title is the first level-1 heading, as written.
+    return block[2:].split("\n", 1)[0].strip()
+
+
+def find_title(blocks, block_types):
+    for block, block_type in zip(blocks, block_types):
+        if block_type == BlockType.HEADING and block.startswith("# "):
+            return block_title(block)
+    raise Exception("markdown has no h1 header")
+
+
+def block_word_count(block, block_type):
+    # Whitespace-separated words of the text the block renders, without its
+    # markers: heading #s, list markers, quote >s, code fences and the
+    # fence's info string.
+    match block_type:
+        case BlockType.HEADING:
+            return len(block.split()) - 1
+        case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+            return len(block.split()) - block.count("\n") - 1
+        case BlockType.QUOTE:
+            return sum(len(line.lstrip(">").split()) for line in block.split("\n"))
+        case BlockType.CODE:
+            code = block[3:-3]
+            if "\n" in code:
+                code = code.split("\n", 1)[1]
+            return len(code.split())
+    return len(block.split())
+
+
+class DocumentParser:
+    # One pass over the blocks that builds each block's node and picks up
+    # the title, outline and counts on the way. nodes() is lazy, so a page
+    # can be written out while it is parsed. on_text, if given, is called
+    # with each block's text (see page_text), and on_links with the number
+    # of each block's first line, the block and its links (see node_links).
+    def __init__(self, block_cache=None, heading_ids=False, on_text=None, on_links=None):
+        self.block_cache = block_cache
+        self.heading_ids = heading_ids
+        self.on_text = on_text
+        self.on_links = on_links
+        self.title = None
+        self.headings = []
+        self.slugs = set()
+        self.block_count = 0
+        self.word_count = 0
+
+    def nodes(self, lines):
+        for first_line, block in iter_numbered_blocks(lines):
+            block_type = block_to_block_type(block)
+            node = self.block_node(block, block_type)
+            # A cached block carries the text and links it was rendered from.
+            if self.on_text is not None:
+                self.on_text(node.texts if isinstance(node, RawNode) else page_text(node))
+            if self.on_links is not None and "](" in block:
+                self.on_links(first_line, block,
+                              node.links if isinstance(node, RawNode) else node_links(node))
+            yield node
+
+    def block_node(self, block, block_type):
+        block_cache = self.block_cache
+        self.block_count += 1
+        self.word_count += block_word_count(block, block_type)
+        if block_type != BlockType.HEADING:
+            return block_to_html_node(block, block_type) if block_cache is None else block_cache.node(block)
+
+        if self.heading_ids or block_cache is None:
+            node = block_to_html_node(block, block_type)
+        else:
+            node = block_cache.node(block)
+        level = HEADING_RE.match(block).end() - 1
+        if self.title is None and level == 1:
+            self.title = block_title(block)
+        text = heading_text(node, block, level)
+        slug = slugify(text)
+        if slug in self.slugs:
+            suffix = 2
+            while f"{slug}-{suffix}" in self.slugs:
+                suffix += 1
+            slug = f"{slug}-{suffix}"
+        self.slugs.add(slug)
+        self.headings.append(Heading(level, text, slug))
+        if self.heading_ids:
+            node.props = {"id": slug}
+        return node
+
+
+def parse_document(lines, block_cache=None, heading_ids=False, on_text=None, on_links=None):
+    parser = DocumentParser(block_cache, heading_ids, on_text, on_links)
+    children = list(parser.nodes(lines))
+    if parser.title is None:
+        raise Exception("markdown has no h1 header")
+    return Document(ParentNode("div", children), parser.title, parser.headings, parser.block_count,
+                    parser.word_count)
+
+
+def stream_document(lines, block_cache=None, on_text=None, on_links=None):
+    # parse_document's title and body for a page that is written out as it
+    # is parsed. Only the blocks up to the title are held in memory; the
+    # rest are parsed while the body is written, so the body can only be
+    # written once. Returns (title, body node).
+    parser = DocumentParser(block_cache, on_text=on_text, on_links=on_links)
+    nodes = parser.nodes(lines)
+    head = []
+    for node in nodes:
+        head.append(node)
+        if parser.title is not None:
+            return parser.title, ParentNode("div", itertools.chain(head, nodes))
+    raise Exception("markdown has no h1 header")
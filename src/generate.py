@@ -1,41 +1,243 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from block_cache import BlockCache
+from document import find_title, node_links, parse_document, stream_document
+from htmlnode import RawNode
+from links import locate_links
+from output import open_output, output_writer
+from plan import BuildPlan, stat_template
+from search import count_terms, page_text
+from template import load_template
 from utils import *
 
-def generate_page(from_path, template_path, dest_path):
-    if not os.path.isfile(from_path):
-        raise(f"{from_path} is not a file")
-
-    if not os.path.isfile(template_path):
-        raise(f"{template_path} is not a file")
+def generate_page(from_path, template_path, dest_path, profiler=None, parse_cache=None, block_cache=None,
+                  template_stat=None, index_terms=False, index_links=False):
+    # Planned pages pass the template's stat from the plan; the plan has
+    # already found both files, so they are not checked again per page.
+    # Returns (title, terms, links); with index_terms the page's search
+    # terms are counted while it is parsed, and with index_links its links
+    # are collected (see locate_links). Otherwise, and on a parse cache hit
+    # where nothing is parsed, they are None.
+    if template_stat is None:
+        if not os.path.isfile(from_path):
+            raise Exception(f"{from_path} is not a file")
+        template_stat = stat_template(template_path)
 
     print(f"Generate page from {from_path} to {dest_path} using {template_path}")
-    from_f = open(from_path, "r")
-    template_f = open(template_path, "r")
-
-    markdown = from_f.read()
-    template = template_f.read()
-    node = markdown_to_html_node(markdown)
-    content = node.to_html()
-    title = extract_title(markdown)
-    output = template.replace("{{ Title }}", title).replace("{{ Content }}", content)
-
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    dest_f = open(dest_path, "w")
-    dest_f.write(output)
-
-    dest_f.close()
-    template_f.close()
-    from_f.close()
-
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    entries = os.listdir(dir_path_content)
-    for entry in entries:
-        content_path = os.path.join(dir_path_content, entry)
-        if os.path.isfile(content_path) and entry.endswith(".md"):
-            dest_path = os.path.join(dest_dir_path, entry[:-3] + ".html")
-            generate_page(content_path, template_path, dest_path)
-        elif os.path.isdir(content_path):
-            child_dest_dir_path = os.path.join(dest_dir_path, entry)
-            generate_pages_recursive(content_path, template_path, child_dest_dir_path)
-        
+    terms = {} if index_terms else None
+    on_text = None if terms is None else partial(count_terms, terms=terms)
+    links = [] if index_links else None
+    on_links = None if links is None else partial(locate_links, found=links)
+    if profiler is not None:
+        title = generate_page_profiled(from_path, template_path, dest_path, profiler.page(from_path),
+                                       template_stat, on_text, on_links)
+        return title, terms, links
+
+    template = load_template(template_path, template_stat)
+    if parse_cache is not None:
+        title, content, cached = parse_page_cached(from_path, parse_cache, block_cache, on_text, on_links)
+        with open_output(dest_path) as dest_f:
+            template.write(dest_f, {"Title": title, "Content": content})
+        if cached:
+            return title, None, None
+        return title, terms, links
+
+    with open(from_path, "r") as from_f:
+        # The file is read once: blocks are parsed up to the title, and the
+        # rest while the body is written.
+        title, node = stream_document(from_f, block_cache, on_text, on_links)
+        with open_output(dest_path) as dest_f:
+            template.write(dest_f, {"Title": title, "Content": node})
+    return title, terms, links
+
+
+def parse_page_cached(from_path, parse_cache, block_cache=None, on_text=None, on_links=None):
+    # Returns (title, body, whether the body came from the cache).
+    key = parse_cache.key_for_file(from_path)
+    cached = parse_cache.get(key)
+    if cached is not None:
+        title, content = cached
+        return title, RawNode(content), True
+    with open(from_path, "r") as from_f:
+        document = parse_document(from_f, block_cache, on_text=on_text, on_links=on_links)
+    content = document.node.to_html()
+    parse_cache.put(key, document.title, content)
+    return document.title, RawNode(content), False
+
+
+def generate_page_profiled(from_path, template_path, dest_path, page_profile, template_stat=None,
+                           on_text=None, on_links=None):
+    # Same output as generate_page, but each stage runs to completion on its
+    # own so it can be timed; this holds the whole page in memory.
+    with page_profile.stage("read"):
+        with open(from_path, "r") as from_f:
+            markdown = from_f.read()
+    with page_profile.stage("blocks"):
+        numbered_blocks = list(iter_numbered_blocks(markdown.split("\n")))
+        blocks = [block for _, block in numbered_blocks]
+    with page_profile.stage("classify"):
+        block_types = [block_to_block_type(block) for block in blocks]
+    with page_profile.stage("inline"):
+        children = [block_to_html_node(block, block_type) for block, block_type in zip(blocks, block_types)]
+        node = ParentNode("div", children)
+    with page_profile.stage("title"):
+        title = find_title(blocks, block_types)
+    with page_profile.stage("to_html"):
+        content = node.to_html()
+    with page_profile.stage("render"):
+        template = load_template(template_path, template_stat)
+        output = template.render({"Title": title, "Content": RawNode(content)})
+    with page_profile.stage("write"):
+        with open_output(dest_path) as dest_f:
+            dest_f.write(output)
+    if on_text is not None:
+        on_text(page_text(node))
+    if on_links is not None:
+        for (first_line, block), child in zip(numbered_blocks, children):
+            if "](" in block:
+                on_links(first_line, block, node_links(child))
+    return title
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    plan = BuildPlan()
+    plan.add_pages(dir_path_content, dest_dir_path)
+    return [(job.source_path, job.dest_path) for job in plan.pages]
+
+
+def page_key(manifest, content_path, template_path, stat=None, template_stat=None):
+    return f"{manifest.input_hash(content_path, stat)}:{manifest.input_hash(template_path, template_stat)}"
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, profiler=None,
+                             parse_cache=None, block_cache=None):
+    plan = BuildPlan()
+    plan.add_pages(dir_path_content, dest_dir_path)
+    plan.add_template(template_path)
+    generate_planned_pages(plan.pages, template_path, manifest, profiler, parse_cache, block_cache,
+                           plan.template_stat)
+
+
+def index_page(job, page, search_index=None, link_index=None):
+    # Hands what generate_page collected for a page to the indexes.
+    title, terms, links = page
+    if terms is not None:
+        search_index.add_page(job, title, terms)
+    if links is not None:
+        link_index.add_page(job, links)
+
+
+def generate_planned_pages(pages, template_path, manifest=None, profiler=None, parse_cache=None,
+                           block_cache=None, template_stat=None, search_index=None, link_index=None):
+    if template_stat is None:
+        template_stat = stat_template(template_path)
+    for job in pages:
+        key = None
+        if manifest is not None:
+            key = page_key(manifest, job.source_path, template_path, job.stat, template_stat)
+            if manifest.is_fresh(job.dest_path, key):
+                continue
+        page = generate_page(job.source_path, template_path, job.dest_path, profiler, parse_cache,
+                             block_cache, template_stat, search_index is not None, link_index is not None)
+        index_page(job, page, search_index, link_index)
+        if manifest is not None:
+            manifest.record(job.dest_path, [job.source_path, template_path], key)
+
+
+# Each worker process keeps one block cache for the whole build.
+_worker_block_cache = None
+
+
+def _init_worker(block_cache_max_bytes):
+    global _worker_block_cache
+    if block_cache_max_bytes is not None:
+        _worker_block_cache = BlockCache(block_cache_max_bytes)
+
+
+def _cache_counters(cache):
+    if cache is None:
+        return 0, 0
+    return cache.hits, cache.misses
+
+
+def _generate_page_job(job):
+    content_path, template_path, template_stat, dest_path, parse_cache, index_terms, index_links = job
+    block_cache = _worker_block_cache
+    # Workers hold their own copy of the caches and of the output writer, so
+    # their counters and the output's digest travel back with the result.
+    parse_before = _cache_counters(parse_cache)
+    block_before = _cache_counters(block_cache)
+    error = None
+    page = None
+    try:
+        page = generate_page(content_path, template_path, dest_path, parse_cache=parse_cache,
+                             block_cache=block_cache, template_stat=template_stat, index_terms=index_terms,
+                             index_links=index_links)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    parse_after = _cache_counters(parse_cache)
+    block_after = _cache_counters(block_cache)
+    return (error,
+            (parse_after[0] - parse_before[0], parse_after[1] - parse_before[1]),
+            (block_after[0] - block_before[0], block_after[1] - block_before[1]),
+            output_writer.digests.get(dest_path),
+            page)
+
+
+def generate_pages_parallel(dir_path_content, template_path, dest_dir_path, workers=None, manifest=None,
+                            parse_cache=None, block_cache=None):
+    plan = BuildPlan()
+    plan.add_pages(dir_path_content, dest_dir_path)
+    plan.add_template(template_path)
+    return generate_planned_pages_parallel(plan.pages, template_path, workers, manifest, parse_cache,
+                                           block_cache, plan.template_stat)
+
+
+def generate_planned_pages_parallel(pages, template_path, workers=None, manifest=None, parse_cache=None,
+                                    block_cache=None, template_stat=None, search_index=None, link_index=None):
+    # block_cache only sets the size of each worker's own cache and collects
+    # their hit/miss counts; its entries are not shared between processes.
+    if template_stat is None:
+        template_stat = stat_template(template_path)
+    index_terms = search_index is not None
+    index_links = link_index is not None
+    jobs = []
+    keys = []
+    plan_jobs = []
+    for page in pages:
+        key = None
+        if manifest is not None:
+            key = page_key(manifest, page.source_path, template_path, page.stat, template_stat)
+            if manifest.is_fresh(page.dest_path, key):
+                continue
+        jobs.append((page.source_path, template_path, template_stat, page.dest_path, parse_cache,
+                     index_terms, index_links))
+        keys.append(key)
+        plan_jobs.append(page)
+    if len(jobs) == 0:
+        return []
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    chunksize = max(1, len(jobs) // (workers * 4))
+    errors = []
+    block_cache_max_bytes = None if block_cache is None else block_cache.max_bytes
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(block_cache_max_bytes,)) as executor:
+        results = executor.map(_generate_page_job, jobs, chunksize=chunksize)
+        for plan_job, key, result in zip(plan_jobs, keys, results):
+            error, parse_counts, block_counts, digest, indexed = result
+            content_path, dest_path = plan_job.source_path, plan_job.dest_path
+            if digest is not None:
+                output_writer.digests[dest_path] = digest
+            for cache, (hits, misses) in ((parse_cache, parse_counts), (block_cache, block_counts)):
+                if cache is not None:
+                    cache.hits += hits
+                    cache.misses += misses
+            if error is not None:
+                errors.append((content_path, error))
+                continue
+            index_page(plan_job, indexed, search_index, link_index)
+            if manifest is not None:
+                manifest.record(dest_path, [content_path, template_path], key)
+    return errors
@@ -1,5 +1,32 @@
+# & must come first so the other entities are not escaped twice.
+TEXT_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"))
+ATTRIBUTE_ESCAPES = TEXT_ESCAPES + (('"', "&quot;"), ("'", "&#x27;"))
+
+
+def _escape(value, escapes):
+    # Most text has nothing to escape, so check with `in` (a fast C scan)
+    # before paying for any replacement.
+    for char, _ in escapes:
+        if char in value:
+            break
+    else:
+        return value
+    for char, entity in escapes:
+        value = value.replace(char, entity)
+    return value
+
+
+def escape_text(value):
+    return _escape(value, TEXT_ESCAPES)
+
+
+def escape_attribute(value):
+    return _escape(str(value), ATTRIBUTE_ESCAPES)
+
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,13 +35,19 @@ class HTMLNode:
 
     def to_html(self):
         raise NotImplementedError
+
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, stream):
+        write = stream.write
+        for chunk in self.iter_html():
+            write(chunk)
     
     def props_to_html(self):
-        if self.props is None or len(self.props) == 0:
+        if not self.props:
             return ""
-        props_as_strings = [f'{k}="{v}"' for k, v in self.props.items()]
-        props_string = " ".join(props_as_strings)
-        return f" {props_string}"
+        return "".join([f' {k}="{escape_attribute(v)}"' for k, v in self.props.items()])
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.tag}, {self.value}, {self.children}, {self.props})"
@@ -27,6 +60,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, children=None, props=props)
 
@@ -34,24 +69,63 @@ class LeafNode(HTMLNode):
         if self.value is None:
             raise ValueError("leaf nodes must have a value")
         
+        value = self.value
+        # escape_text's fast path inlined, since this runs once per leaf
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
+
         if (not isinstance(self.tag, str)):
-            return self.value
-        
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+
+        if not self.props:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
+
+
+class RawNode(HTMLNode):
+    # Already-rendered HTML, written out verbatim.
+    __slots__ = ()
+
+    def __init__(self, html):
+        super().__init__(value=html)
+
+    def to_html(self):
+        return self.value
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, value=None, children=children, props=props)
     
-    def to_html(self):
+    def check(self):
         if (not isinstance(self.tag, str)):
             raise ValueError("ParentNode must have a tag")
         
         if self.children is None:
             raise ValueError("ParentNode must have children")
-        
-        children_string = "".join([child.to_html() for child in self.children])
-        return f"<{self.tag}>{children_string}</{self.tag}>"
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Walks the tree with an explicit stack so each chunk is produced
+        # once, instead of every level re-joining its whole subtree.
+        self.check()
+        yield f"<{self.tag}{self.props_to_html()}>"
+        stack = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, closing_tag = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    child.check()
+                    yield f"<{child.tag}{child.props_to_html()}>"
+                    stack.append((iter(child.children), f"</{child.tag}>"))
+                    break
+                yield from child.iter_html()
+            else:
+                stack.pop()
+                yield closing_tag
 
 
@@ -0,0 +1,149 @@
+import json
+import posixpath
+from urllib.parse import unquote, urlsplit
+from document import node_links
+from output import write_json_atomic
+from plan import relative_output
+from utils import block_to_html_node, iter_numbered_blocks
+
+LINK_INDEX_VERSION = 2
+
+
+def locate_links(first_line, block, links, found):
+    # Appends (line, tag, url) to found for each of the block's links, with
+    # the line its ](url) is on.
+    cursor = 0
+    for tag, url in links:
+        position = block.find(f"]({url})", cursor)
+        if position == -1:
+            position = cursor
+        else:
+            cursor = position + 1
+        found.append((first_line + block.count("\n", 0, position), tag, url))
+    return found
+
+
+def block_links(block):
+    # The block goes through the real renderer, so the index holds exactly
+    # the URLs that end up in the HTML (not, say, a [link](x) inside `code`).
+    return node_links(block_to_html_node(block))
+
+
+def page_links(lines):
+    links = []
+    for first_line, block in iter_numbered_blocks(lines):
+        # Most blocks have no links and are never rendered here.
+        if "](" in block:
+            locate_links(first_line, block, block_links(block), links)
+    return links
+
+
+def resolve_internal(page_url, url):
+    # Returns the site path a link points at, or None for external URLs and
+    # same-page anchors.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or parts.path == "":
+        return None
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_url), path)
+    resolved = posixpath.normpath(path)
+    if path.endswith("/") and resolved != "/":
+        resolved += "/"
+    return resolved
+
+
+class LinkIndex:
+    def __init__(self):
+        # page URL -> {"source", "size", "mtime_ns", "links": [[line, tag, url], ...]}
+        self.pages = {}
+        self.targets = set()
+        # source path -> the same, for the pages generated in this build
+        self.generated = {}
+        self.indexed = 0
+        self.read = 0
+        self.reused = 0
+
+    @classmethod
+    def build(cls, plan, dest_dir):
+        index = cls()
+        index.update(plan, dest_dir)
+        return index
+
+    def add_page(self, job, links):
+        # The build calls this with the links it found while generating the
+        # page.
+        self.generated[job.source_path] = {
+            "source": job.source_path,
+            "size": job.stat.st_size,
+            "mtime_ns": job.stat.st_mtime_ns,
+            "links": [list(link) for link in links],
+        }
+
+    def update(self, plan, dest_dir):
+        # As in SearchIndex.update: pages generated in this build were indexed
+        # as they were parsed and unchanged pages keep their links, so only
+        # the rest are read here.
+        targets = set()
+        for job in plan.static_files:
+            targets.add("/" + relative_output(job, dest_dir))
+        pages = {}
+        for job in plan.pages:
+            page_url = "/" + relative_output(job, dest_dir)
+            targets.add(page_url)
+            entry = self.generated.get(job.source_path)
+            if entry is None:
+                entry = self.pages.get(page_url)
+                stat = (job.stat.st_size, job.stat.st_mtime_ns)
+                if (entry is not None and entry["source"] == job.source_path
+                        and (entry["size"], entry["mtime_ns"]) == stat):
+                    self.reused += 1
+                else:
+                    with open(job.source_path, "r") as f:
+                        links = page_links(f)
+                    self.add_page(job, links)
+                    entry = self.generated[job.source_path]
+                    self.read += 1
+                    self.indexed += 1
+            else:
+                self.indexed += 1
+            pages[page_url] = entry
+        self.pages = pages
+        self.targets = targets
+        self.generated = {}
+
+    def exists(self, path):
+        if path in self.targets:
+            return True
+        return posixpath.join(path, "index.html") in self.targets
+
+    def check(self):
+        broken = []
+        for page_url, page in self.pages.items():
+            for line, tag, url in page["links"]:
+                path = resolve_internal(page_url, url)
+                if path is not None and not self.exists(path):
+                    broken.append((page["source"], line, tag, url))
+        return broken
+
+    def link_count(self):
+        return sum(len(page["links"]) for page in self.pages.values())
+
+    def save(self, path):
+        data = {
+            "version": LINK_INDEX_VERSION,
+            "pages": self.pages,
+            "targets": sorted(self.targets),
+        }
+        write_json_atomic(path, data, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != LINK_INDEX_VERSION:
+            raise ValueError(f"{path} has an unsupported version")
+        index = cls()
+        index.pages = data["pages"]
+        index.targets = set(data["targets"])
+        return index
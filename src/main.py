@@ -1,24 +1,271 @@
+import argparse
 import os
 import shutil
-from copy_file import copy_from_source_to_dest
-from generate import generate_pages_recursive
+import sys
+import time
+from async_build import generate_pages_async
+from block_cache import BlockCache
+from compress import ENCODINGS, precompress_outputs
+from copy_file import SyncStats, copy_planned_files
+from generate import generate_planned_pages, generate_planned_pages_parallel
+from links import LinkIndex
+from manifest import Manifest
+from output import output_writer, sweep_temp_files
+from parse_cache import ParseCache
+from plan import make_build_plan
+from profiling import BuildProfiler
+from search import SearchIndex
+from shard import (copy_shard_outputs, inputs_digest, parse_shard, plan_digest, select_shard,
+                   shard_public_dir, validate_shards, write_shard_manifest)
 from textnode import TextType, TextNode
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from utils import *
 
 
-def main():
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into ./public")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep ./public and only rebuild outputs whose inputs changed")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes for page generation (0 = one per CPU)")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--hardlink-static", action="store_true",
+                        help="hardlink static files into ./public instead of copying them")
+    parser.add_argument("--parse-cache", action="store_true",
+                        help="reuse parsed page bodies and titles from an on-disk cache")
+    parser.add_argument("--parse-cache-dir", default="./.cache/parse",
+                        help="directory of the --parse-cache entries")
+    parser.add_argument("--parse-cache-max-mb", type=int, default=512,
+                        help="least recently used entries are evicted above this size")
+    parser.add_argument("--block-cache", action="store_true",
+                        help="render repeated blocks once per build (per worker with -j)")
+    parser.add_argument("--block-cache-max-mb", type=int, default=64,
+                        help="least recently used blocks are dropped above this size")
+    parser.add_argument("--async-io", action="store_true",
+                        help="overlap page reads and writes with parsing using asyncio")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="in-flight reads/writes for --async-io")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .zst/.br where available) siblings of compressible outputs")
+    parser.add_argument("--search-index", action="store_true",
+                        help="write a sharded search index of every page to ./public/search")
+    parser.add_argument("--check-links", action="store_true",
+                        help="index every page's links and images and report internal ones that point nowhere")
+    parser.add_argument("--link-index", default="./.cache/links.json",
+                        help="where --check-links saves the link index")
+    parser.add_argument("--shard", type=shard_arg, metavar="i/N",
+                        help="build only shard i of N (1-based) into --shard-dir")
+    parser.add_argument("--shard-dir",
+                        help="where --shard writes its outputs and manifest (default ./shards/i-of-N)")
+    parser.add_argument("--merge-shards", nargs="+", metavar="SHARD_DIR",
+                        help="validate the given --shard directories and combine them into ./public")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every build stage per page and report the slowest (runs serially)")
+    parser.add_argument("--profile-output", default="./.cache/build-profile.json",
+                        help="where --profile writes its JSON report")
+    args = parser.parse_args(argv)
+    if args.incremental and (args.shard is not None or args.merge_shards is not None):
+        parser.error("--incremental cannot be combined with --shard or --merge-shards")
+    if args.shard is not None and args.merge_shards is not None:
+        parser.error("--shard and --merge-shards are separate steps")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 (one per CPU) or more")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+def generate_pages(args, pages, template_path, manifest=None, template_stat=None, search_index=None,
+                   link_index=None):
+    parse_cache = None
+    if args.parse_cache and not args.profile:
+        parse_cache = ParseCache(args.parse_cache_dir, args.parse_cache_max_mb * 1024 * 1024)
+    block_cache = None
+    if args.block_cache and not args.profile:
+        block_cache = BlockCache(args.block_cache_max_mb * 1024 * 1024)
+    try:
+        generate_pages_with(args, pages, template_path, manifest, parse_cache, block_cache, template_stat,
+                            search_index, link_index)
+    finally:
+        if parse_cache is not None:
+            evicted = parse_cache.evict()
+            print(f"{parse_cache.summary()}, {evicted} evicted")
+        if block_cache is not None:
+            print(block_cache.summary())
+
+
+def generate_pages_with(args, pages, template_path, manifest, parse_cache, block_cache=None,
+                        template_stat=None, search_index=None, link_index=None):
+    if args.profile:
+        profiler = BuildProfiler()
+        profiler.start()
+        try:
+            generate_planned_pages(pages, template_path, manifest, profiler, template_stat=template_stat,
+                                   search_index=search_index, link_index=link_index)
+        finally:
+            profiler.stop()
+        profiler.print_summary()
+        profiler.write_json(args.profile_output)
+        print(f"Wrote profile report to {args.profile_output}")
+        return
+    if args.async_io:
+        errors = generate_pages_async(pages, template_path, args.concurrency, manifest, block_cache,
+                                      template_stat, parse_cache, search_index, link_index)
+    elif args.jobs == 1:
+        generate_planned_pages(pages, template_path, manifest, parse_cache=parse_cache,
+                               block_cache=block_cache, template_stat=template_stat,
+                               search_index=search_index, link_index=link_index)
+        return
+    else:
+        errors = generate_planned_pages_parallel(pages, template_path, workers=args.jobs or None,
+                                                 manifest=manifest, parse_cache=parse_cache,
+                                                 block_cache=block_cache, template_stat=template_stat,
+                                                 search_index=search_index, link_index=link_index)
+    for content_path, error in errors:
+        print(f"Failed to generate {content_path}: {error}", file=sys.stderr)
+    if len(errors) > 0:
+        raise SystemExit(f"{len(errors)} page(s) failed to generate")
+
+
+def build(args, plan, template_path, manifest=None, search_index=None, link_index=None):
+    # The plan is the only walk over content/ and static/; every stage
+    # below works from its job lists.
+    plan.make_dest_dirs()
+    stats = SyncStats()
+    copy_planned_files(plan.static_files, manifest, args.checksum, args.hardlink_static, stats)
+    print(stats.summary())
+    generate_pages(args, plan.pages, template_path, manifest, plan.template_stat, search_index, link_index)
+
+
+def precompress(paths):
+    manifest = Manifest.load("./.cache/precompress.json")
+    start = time.perf_counter()
+    stats = precompress_outputs(paths, manifest, digests=output_writer.digests)
+    for removed in manifest.prune():
+        print(f"Removed stale output {removed}")
+    manifest.save()
+    elapsed = time.perf_counter() - start
+    print(f"{stats.summary()} [{', '.join(e[0] for e in ENCODINGS)}] in {elapsed:.2f} s")
+
+
+def build_shard(args, content_path, static_path, template_path):
+    index, count = args.shard
+    shard_dir = args.shard_dir or os.path.join("./shards", f"{index}-of-{count}")
+    dest_dir = shard_public_dir(shard_dir)
+    if os.path.isdir(shard_dir):
+        shutil.rmtree(shard_dir)
+    plan = make_build_plan(content_path, static_path, dest_dir, template_path)
+    # Every shard records the digest of the full plan and the content hash
+    # of its own inputs, so the merge can tell that they were all built from
+    # the same tree without any runner reading the whole site.
+    digest = plan_digest(plan, dest_dir)
+    select_shard(plan, index, count, dest_dir)
+    os.makedirs(dest_dir, exist_ok=True)
+    build(args, plan, template_path)
+    manifest_path = write_shard_manifest(shard_dir, index, count, digest, plan, dest_dir, template_path)
+    print(f"Built shard {index}/{count}: {len(plan.pages)} page(s), "
+          f"{len(plan.static_files)} static file(s), manifest {manifest_path}")
+
+
+def merge_shards(args, plan, dest_dir, template_path):
+    try:
+        outputs = validate_shards(args.merge_shards, inputs_digest(plan, dest_dir, template_path))
+    except ValueError as e:
+        raise SystemExit(f"Cannot merge shards: {e}")
+    if os.path.isdir(dest_dir):
+        shutil.rmtree(dest_dir)
+    os.makedirs(dest_dir)
+    copy_shard_outputs(outputs, dest_dir, args.hardlink_static)
+    print(f"Merged {len(outputs)} output(s) from {len(args.merge_shards)} shard(s) into {dest_dir}")
+
+
+def write_search_index(index, plan, dest_dir):
+    index.update(plan, dest_dir)
+    outputs = index.write(os.path.join(dest_dir, "search"))
+    index.save()
+    print(index.summary())
+    return outputs
+
+
+def load_link_index(path):
+    # A missing or outdated index just means every page is read once.
+    try:
+        return LinkIndex.load(path)
+    except (FileNotFoundError, ValueError):
+        return LinkIndex()
+
+
+def check_links(args, index, plan, dest_dir):
+    index.update(plan, dest_dir)
+    index.save(args.link_index)
+    broken = index.check()
+    for source_path, line, tag, url in broken:
+        kind = "image" if tag == "img" else "link"
+        print(f"{source_path}:{line}: broken {kind} {url}", file=sys.stderr)
+    print(f"Checked {index.link_count()} link(s) on {len(index.pages)} page(s) "
+          f"({index.reused} unchanged, {index.read} read again), "
+          f"{len(broken)} broken; index saved to {args.link_index}")
+    if len(broken) > 0:
+        raise SystemExit(f"{len(broken)} broken link(s)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
     dir_path_static = "./static"
     dir_path_public = "./public"
     content_path = "./content"
     template_path = "./template.html"
+    manifest_path = "./.cache/manifest.json"
+    output_digests_path = "./.cache/outputs.json"
     # output_path = f"{dir_path_public}/index.html"
 
+    if args.shard is not None:
+        # A shard only sees part of the site, so the whole-site stages below
+        # run after --merge-shards instead.
+        build_shard(args, content_path, dir_path_static, template_path)
+        return
+
+    plan = make_build_plan(content_path, dir_path_static, dir_path_public, template_path)
+    # Pages are indexed for search and links while they are generated; see
+    # write_search_index and check_links for the rest.
+    search_index = SearchIndex.load("./.cache/search.json") if args.search_index else None
+    link_index = load_link_index(args.link_index) if args.check_links else None
+    if args.merge_shards is not None:
+        merge_shards(args, plan, dir_path_public, template_path)
+    elif args.incremental:
+        manifest = Manifest.load(manifest_path)
+        output_writer.load_digests(output_digests_path)
+        for removed in sweep_temp_files(dir_path_public):
+            print(f"Removed leftover temp file {removed}")
+        try:
+            build(args, plan, template_path, manifest, search_index, link_index)
+            removed_outputs = manifest.prune()
+            for removed in removed_outputs:
+                print(f"Removed stale output {removed}")
+            output_writer.forget(removed_outputs)
+        finally:
+            manifest.save()
+            output_writer.save_digests(output_digests_path)
+    else:
+        if os.path.isdir(dir_path_public):
+            shutil.rmtree(dir_path_public)
+        build(args, plan, template_path, search_index=search_index, link_index=link_index)
 
-    if os.path.isdir(dir_path_public):
-        shutil.rmtree(dir_path_public)
-    copy_from_source_to_dest(dir_path_static, dir_path_public)
-    generate_pages_recursive(content_path, template_path, dir_path_public)
+    outputs = [job.dest_path for job in plan.static_files + plan.pages]
+    if search_index is not None:
+        outputs.extend(write_search_index(search_index, plan, dir_path_public))
+    if args.precompress:
+        precompress(outputs)
+    if link_index is not None:
+        check_links(args, link_index, plan, dir_path_public)
 
     
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import json
+import os
+from output import file_hash, write_json_atomic
+
+
+MANIFEST_VERSION = 1
+
+
+class Manifest:
+    def __init__(self, path=None):
+        self.path = path
+        self.inputs = {}
+        self.outputs = {}
+        self.seen_inputs = set()
+        self.seen_outputs = set()
+
+    @classmethod
+    def load(cls, path):
+        manifest = cls(path)
+        if not os.path.isfile(path):
+            return manifest
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        manifest.inputs = data.get("inputs", {})
+        manifest.outputs = data.get("outputs", {})
+        return manifest
+
+    def save(self):
+        if self.path is None:
+            raise ValueError("manifest has no path to save to")
+        data = {
+            "version": MANIFEST_VERSION,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+        }
+        write_json_atomic(self.path, data, indent=1, sort_keys=True)
+
+    def input_hash(self, path, stat=None):
+        # size and mtime are trusted, so unchanged inputs are never re-read
+        if stat is None:
+            stat = os.stat(path)
+        self.seen_inputs.add(path)
+        entry = self.inputs.get(path)
+        if (entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns):
+            return entry["hash"]
+        return self.record_input(path, stat, file_hash(path))
+
+    def record_input(self, path, stat, digest):
+        # For an input whose hash is already known, e.g. an output hashed
+        # while it was written.
+        self.seen_inputs.add(path)
+        self.inputs[path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest,
+        }
+        return digest
+
+    def is_fresh(self, dest_path, key):
+        # An output recorded with exists=False was left out on purpose and
+        # stays fresh without a file.
+        self.seen_outputs.add(dest_path)
+        entry = self.outputs.get(dest_path)
+        return (entry is not None
+                and entry["key"] == key
+                and (not entry.get("exists", True) or os.path.exists(dest_path)))
+
+    def record(self, dest_path, sources, key, exists=True):
+        self.seen_outputs.add(dest_path)
+        self.outputs[dest_path] = {"sources": sources, "key": key}
+        if not exists:
+            self.outputs[dest_path]["exists"] = False
+
+    def prune(self):
+        removed = []
+        for dest_path in list(self.outputs):
+            if dest_path in self.seen_outputs:
+                continue
+            if os.path.isfile(dest_path):
+                os.remove(dest_path)
+            del self.outputs[dest_path]
+            removed.append(dest_path)
+        for path in list(self.inputs):
+            if path not in self.seen_inputs:
+                del self.inputs[path]
+        return removed
@@ -0,0 +1,164 @@
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+from contextlib import contextmanager
+
+OUTPUT_DIGESTS_VERSION = 1
+TEMP_NAME_RE = re.compile(r"\..+\.\d+\.\d+\.tmp")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    # For the build's own state files (manifests, caches, indexes), which
+    # are swapped in whole so an interrupted build never leaves half of one.
+    dir_name = os.path.dirname(path)
+    if dir_name != "":
+        os.makedirs(dir_name, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+
+class HashingFileIO(io.FileIO):
+    # Hashes the bytes as they reach the file, so the output's digest is
+    # known without reading it back.
+    def __init__(self, fd):
+        super().__init__(fd, "w")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        written = super().write(data)
+        if written:
+            self.digest.update(memoryview(data)[:written])
+            self.size += written
+        return written
+
+
+class OutputWriter:
+    def __init__(self, buffer_size=1 << 20):
+        self.buffer_size = buffer_size
+        self.created_dirs = set()
+        # dest path -> [size, mtime_ns, sha256] of the outputs last written
+        self.digests = {}
+        self.written = 0
+        self.unchanged = 0
+        self._tmp_counter = itertools.count()
+
+    def ensure_dir(self, dir_path):
+        if dir_path in self.created_dirs:
+            return
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        self.created_dirs.add(dir_path)
+
+    def temp_path(self, dest_path):
+        dir_path, name = os.path.split(dest_path)
+        return os.path.join(dir_path, f".{name}.{os.getpid()}.{next(self._tmp_counter)}.tmp")
+
+    def create_temp(self, dest_path):
+        dir_path = os.path.dirname(dest_path)
+        self.ensure_dir(dir_path)
+        tmp_path = self.temp_path(dest_path)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+        try:
+            fd = os.open(tmp_path, flags, 0o666)
+        except FileNotFoundError:
+            # The directory went away since it was cached (e.g. public/ was
+            # wiped while a watcher kept running).
+            self.created_dirs.discard(dir_path)
+            self.ensure_dir(dir_path)
+            fd = os.open(tmp_path, flags, 0o666)
+        return tmp_path, fd
+
+    @contextmanager
+    def open(self, dest_path, mode="w"):
+        tmp_path, fd = self.create_temp(dest_path)
+        try:
+            raw = HashingFileIO(fd)
+            f = io.BufferedWriter(raw, self.buffer_size)
+            if "b" not in mode:
+                f = io.TextIOWrapper(f, encoding="utf-8")
+            with f:
+                yield f
+            self.commit(tmp_path, dest_path, raw.size, raw.digest.hexdigest())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def current_digest(self, dest_path, size):
+        # The digest recorded when dest_path was written, as long as the file
+        # is still that one; an output from an unknown build is read once.
+        try:
+            stat = os.stat(dest_path)
+        except FileNotFoundError:
+            return None
+        if stat.st_size != size:
+            return None
+        entry = self.digests.get(dest_path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = file_hash(dest_path)
+        self.digests[dest_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def commit(self, tmp_path, dest_path, size, digest):
+        # Identical outputs are left alone so their mtime stays put for
+        # rsync/CDN syncs; everything else is swapped in atomically.
+        if self.current_digest(dest_path, size) == digest:
+            os.remove(tmp_path)
+            self.unchanged += 1
+            return False
+        os.replace(tmp_path, dest_path)
+        stat = os.stat(dest_path)
+        self.digests[dest_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self.written += 1
+        return True
+
+    def forget(self, dest_paths):
+        for dest_path in dest_paths:
+            self.digests.pop(dest_path, None)
+
+    def load_digests(self, path):
+        if not os.path.isfile(path):
+            return
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") == OUTPUT_DIGESTS_VERSION:
+            self.digests.update(data["outputs"])
+
+    def save_digests(self, path):
+        write_json_atomic(path, {"version": OUTPUT_DIGESTS_VERSION, "outputs": self.digests},
+                          separators=(",", ":"))
+
+
+def sweep_temp_files(root):
+    # Temp files left behind by an interrupted build sit next to the outputs
+    # they were for, where they would be served and synced.
+    removed = []
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            if TEMP_NAME_RE.fullmatch(file_name):
+                path = os.path.join(dir_path, file_name)
+                os.remove(path)
+                removed.append(path)
+    return removed
+
+
+output_writer = OutputWriter()
+
+
+def open_output(dest_path, mode="w"):
+    return output_writer.open(dest_path, mode)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+# Bump to invalidate every cache entry by hand; edits to the parser modules
+# below already change the key on their own.
+PARSER_VERSION = 1
+PARSER_MODULES = ["utils.py", "document.py", "htmlnode.py", "textnode.py"]
+
+
+def parser_version():
+    digest = hashlib.sha256(str(PARSER_VERSION).encode())
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in PARSER_MODULES:
+        with open(os.path.join(src_dir, module), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ParseCache:
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = parser_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for_file(self, path):
+        digest = hashlib.sha256(self.version.encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key_for_data(self, data):
+        # The same key as key_for_file, for a page that is already in memory.
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            # mtime is the last-used time for LRU eviction
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["title"], entry["body"]
+
+    def put(self, key, title, body):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temp file first so parallel workers never read a
+        # half-written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"title": title, "body": body}, f)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        entries = []
+        total = 0
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        return f"Parse cache: {self.hits} hit(s), {self.misses} miss(es)"
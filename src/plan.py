@@ -0,0 +1,79 @@
+import os
+import stat
+
+
+class FileJob:
+    __slots__ = ("source_path", "dest_path", "stat")
+
+    def __init__(self, source_path, dest_path, stat):
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.stat = stat
+
+    def __repr__(self):
+        return f"FileJob({self.source_path}, {self.dest_path})"
+
+
+def stat_template(template_path):
+    try:
+        template_stat = os.stat(template_path)
+    except FileNotFoundError:
+        template_stat = None
+    if template_stat is None or not stat.S_ISREG(template_stat.st_mode):
+        raise Exception(f"{template_path} is not a file")
+    return template_stat
+
+
+def relative_output(job, dest_dir):
+    # The output's path under dest_dir with "/" separators, as in its URL.
+    return os.path.relpath(job.dest_path, dest_dir).replace(os.sep, "/")
+
+
+class BuildPlan:
+    def __init__(self):
+        self.pages = []
+        self.static_files = []
+        self.dest_dirs = []
+        self.template_stat = None
+
+    def add_pages(self, content_dir, dest_dir):
+        # Only directories that end up holding a page are created.
+        has_pages = False
+        with os.scandir(content_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".md"):
+                    dest_path = os.path.join(dest_dir, entry.name[:-3] + ".html")
+                    self.pages.append(FileJob(entry.path, dest_path, entry.stat()))
+                    has_pages = True
+                elif entry.is_dir():
+                    self.add_pages(entry.path, os.path.join(dest_dir, entry.name))
+        if has_pages:
+            self.dest_dirs.append(dest_dir)
+
+    def add_static(self, static_dir, dest_dir):
+        self.dest_dirs.append(dest_dir)
+        with os.scandir(static_dir) as entries:
+            for entry in entries:
+                dest_path = os.path.join(dest_dir, entry.name)
+                if entry.is_file():
+                    self.static_files.append(FileJob(entry.path, dest_path, entry.stat()))
+                elif entry.is_dir():
+                    self.add_static(entry.path, dest_path)
+
+    def add_template(self, template_path):
+        # One stat for the whole build: every page's manifest key and
+        # template lookup reuse it instead of checking the template again.
+        self.template_stat = stat_template(template_path)
+
+    def make_dest_dirs(self):
+        for dest_dir in self.dest_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+
+
+def make_build_plan(content_dir, static_dir, dest_dir, template_path=None):
+    plan = BuildPlan()
+    if template_path is not None:
+        plan.add_template(template_path)
+    plan.add_static(static_dir, dest_dir)
+    plan.add_pages(content_dir, dest_dir)
+    return plan
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class PageProfile:
+    def __init__(self, path, trace_allocations):
+        self.path = path
+        self.trace_allocations = trace_allocations
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            alloc_bytes = None
+            if self.trace_allocations:
+                alloc_bytes = tracemalloc.get_traced_memory()[1] - start_memory
+            self.stages[name] = {"seconds": seconds, "alloc_bytes": alloc_bytes}
+
+    def total_seconds(self):
+        return sum(stage["seconds"] for stage in self.stages.values())
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "seconds": self.total_seconds(),
+            "stages": self.stages,
+        }
+
+
+class BuildProfiler:
+    def __init__(self, trace_allocations=True):
+        self.trace_allocations = trace_allocations
+        self.pages = []
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def page(self, path):
+        page_profile = PageProfile(path, self.trace_allocations)
+        self.pages.append(page_profile)
+        return page_profile
+
+    def stage_totals(self):
+        totals = {}
+        for page_profile in self.pages:
+            for name, stage in page_profile.stages.items():
+                total = totals.setdefault(name, {"seconds": 0.0, "alloc_bytes": 0})
+                total["seconds"] += stage["seconds"]
+                if stage["alloc_bytes"] is not None:
+                    total["alloc_bytes"] += stage["alloc_bytes"]
+        return totals
+
+    def report(self, top=10):
+        pages = sorted(self.pages, key=lambda p: p.total_seconds(), reverse=True)
+        totals = self.stage_totals()
+        return {
+            "page_count": len(self.pages),
+            "total_seconds": sum(p.total_seconds() for p in self.pages),
+            "trace_allocations": self.trace_allocations,
+            "stages": dict(sorted(totals.items(), key=lambda item: item[1]["seconds"], reverse=True)),
+            "slowest_pages": [p.to_dict() for p in pages[:top]],
+            "pages": [p.to_dict() for p in self.pages],
+        }
+
+    def write_json(self, path, top=10):
+        dir_name = os.path.dirname(path)
+        if dir_name != "":
+            os.makedirs(dir_name, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(top), f, indent=1)
+
+    def print_summary(self, top=10, file=sys.stdout):
+        report = self.report(top)
+        print(f"Profiled {report['page_count']} page(s) in {report['total_seconds']:.3f}s", file=file)
+        print("Slowest stages:", file=file)
+        for name, total in report["stages"].items():
+            line = f"  {name:<10} {total['seconds'] * 1000:10.2f} ms"
+            if self.trace_allocations:
+                line += f"  {total['alloc_bytes'] / 1024:10.1f} KiB allocated"
+            print(line, file=file)
+        print("Slowest pages:", file=file)
+        for page_profile in report["slowest_pages"]:
+            stages = page_profile["stages"]
+            slowest_stage = max(stages, key=lambda name: stages[name]["seconds"])
+            print(f"  {page_profile['seconds'] * 1000:10.2f} ms  {page_profile['path']}"
+                  f"  (slowest stage: {slowest_stage})", file=file)
@@ -0,0 +1,145 @@
+import json
+import os
+import re
+from document import page_text, parse_document
+from output import open_output, write_json_atomic
+from plan import relative_output
+
+SEARCH_INDEX_VERSION = 1
+TERM_RE = re.compile(r"\w\w+")
+
+
+def page_url(job, dest_dir):
+    url = "/" + relative_output(job, dest_dir)
+    if url.endswith("/index.html"):
+        return url[:-len("index.html")]
+    return url
+
+
+def count_terms(texts, terms=None):
+    # With terms, the counts are added to it, so a page can be counted one
+    # block at a time while it is parsed.
+    if terms is None:
+        terms = {}
+    for text in texts:
+        for term in TERM_RE.findall(text.lower()):
+            terms[term] = terms.get(term, 0) + 1
+    return terms
+
+
+def shard_key(term):
+    # Clients fetch only the shard for each query term's first character.
+    first = term[0]
+    return first if first.isascii() and first.isalnum() else "_"
+
+
+class SearchIndex:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        # source path -> {"size", "mtime_ns", "url", "title", "terms"}
+        self.pages = {}
+        # the same, without "url", for the pages generated in this build
+        self.generated = {}
+        self.indexed = 0
+        self.read = 0
+        self.reused = 0
+
+    @classmethod
+    def load(cls, cache_path):
+        index = cls(cache_path)
+        if not os.path.isfile(cache_path):
+            return index
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+        if data.get("version") == SEARCH_INDEX_VERSION:
+            index.pages = data["pages"]
+        return index
+
+    def save(self):
+        if self.cache_path is None:
+            raise ValueError("search index has no cache path to save to")
+        write_json_atomic(self.cache_path, {"version": SEARCH_INDEX_VERSION, "pages": self.pages},
+                          separators=(",", ":"))
+
+    def add_page(self, job, title, terms):
+        # The build calls this with the terms it counted while generating
+        # the page.
+        self.generated[job.source_path] = {
+            "size": job.stat.st_size,
+            "mtime_ns": job.stat.st_mtime_ns,
+            "title": title,
+            "terms": terms,
+        }
+
+    def update(self, plan, dest_dir):
+        # Pages generated in this build were indexed as they were parsed, and
+        # unchanged pages keep the terms counted by an earlier build. Only a
+        # page that is neither (a parse cache hit, or an up to date output
+        # the index has not seen at this size and mtime) is read and parsed
+        # here.
+        pages = {}
+        for job in plan.pages:
+            stat = (job.stat.st_size, job.stat.st_mtime_ns)
+            entry = self.generated.get(job.source_path)
+            if entry is None:
+                entry = self.pages.get(job.source_path)
+                if entry is not None and (entry["size"], entry["mtime_ns"]) == stat:
+                    self.reused += 1
+                else:
+                    entry = self.index_page(job.source_path)
+                    if entry is None:
+                        continue
+                    entry["size"], entry["mtime_ns"] = stat
+                    self.read += 1
+                    self.indexed += 1
+            else:
+                self.indexed += 1
+            entry["url"] = page_url(job, dest_dir)
+            pages[job.source_path] = entry
+        self.pages = pages
+        self.generated = {}
+
+    def index_page(self, source_path):
+        try:
+            with open(source_path, "r") as f:
+                document = parse_document(f)
+        except Exception as e:
+            print(f"Failed to index {source_path}: {e}")
+            return None
+        return {"title": document.title, "terms": count_terms(page_text(document.node))}
+
+    def write(self, out_dir):
+        # pages.json lists [url, title] by page id; terms-<c>.json maps each
+        # term to a flat [page id, count, page id, count, ...] list.
+        entries = sorted(self.pages.values(), key=lambda entry: entry["url"])
+        shards = {}
+        for page_id, entry in enumerate(entries):
+            for term, count in entry["terms"].items():
+                postings = shards.setdefault(shard_key(term), {}).setdefault(term, [])
+                postings.append(page_id)
+                postings.append(count)
+
+        outputs = [os.path.join(out_dir, "pages.json")]
+        self.write_json(outputs[0], [[entry["url"], entry["title"]] for entry in entries])
+        for key, terms in sorted(shards.items()):
+            outputs.append(os.path.join(out_dir, f"terms-{key}.json"))
+            self.write_json(outputs[-1], terms)
+        self.write_json(os.path.join(out_dir, "index.json"), {
+            "version": SEARCH_INDEX_VERSION,
+            "pages": len(entries),
+            "shards": sorted(shards),
+        })
+        outputs.append(os.path.join(out_dir, "index.json"))
+        for name in os.listdir(out_dir):
+            path = os.path.join(out_dir, name)
+            if name.startswith("terms-") and name.endswith(".json") and path not in outputs:
+                os.remove(path)
+        return outputs
+
+    def write_json(self, path, data):
+        with open_output(path) as f:
+            json.dump(data, f, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+    def summary(self):
+        return (f"Search index: {len(self.pages)} page(s), {self.indexed} indexed "
+                f"({self.read} read again), {self.reused} unchanged")
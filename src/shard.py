@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+from copy_file import fast_copy
+from manifest import Manifest, file_hash
+from output import output_writer, write_json_atomic
+from plan import relative_output
+
+
+SHARD_MANIFEST_VERSION = 3
+SHARD_MANIFEST_NAME = "manifest.json"
+
+
+def parse_shard(text):
+    index, sep, count = text.partition("/")
+    if sep == "" or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"shard must look like i/N, got {text!r}")
+    index, count = int(index), int(count)
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard {text} is out of range, i must be between 1 and N")
+    return index, count
+
+
+def shard_public_dir(shard_dir):
+    return os.path.join(shard_dir, "public")
+
+
+def shard_of(rel_path, count):
+    # A stable hash rather than hash(), which is salted per process.
+    digest = hashlib.sha256(rel_path.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def outputs_digest(rel_paths):
+    digest = hashlib.sha256()
+    for rel_path in sorted(rel_paths):
+        digest.update(rel_path.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def plan_digest(plan, dest_dir):
+    return outputs_digest(relative_output(job, dest_dir) for job in plan.pages + plan.static_files)
+
+
+def combine_inputs(template_hash, input_hashes):
+    # input_hashes maps each output's path to its input's content hash.
+    digest = hashlib.sha256(template_hash.encode())
+    for rel_path in sorted(input_hashes):
+        digest.update(f"\0{rel_path}\0{input_hashes[rel_path]}".encode())
+    return digest.hexdigest()
+
+
+def inputs_digest(plan, dest_dir, template_path, manifest=None):
+    # Covers every input's content and the template's, so shards built
+    # from different revisions of the site do not merge even when their
+    # output paths agree. The merge computes this once for the whole plan;
+    # each shard only hashes its own inputs (see write_shard_manifest).
+    if manifest is None:
+        manifest = Manifest()
+    return combine_inputs(manifest.input_hash(template_path, plan.template_stat),
+                          {relative_output(job, dest_dir): manifest.input_hash(job.source_path, job.stat)
+                           for job in plan.pages + plan.static_files})
+
+
+def select_shard(plan, index, count, dest_dir):
+    # Shards are picked by output path relative to dest_dir, so every runner
+    # agrees on the split wherever its checkout lives.
+    plan.pages = [job for job in plan.pages
+                  if shard_of(relative_output(job, dest_dir), count) == index]
+    plan.static_files = [job for job in plan.static_files
+                         if shard_of(relative_output(job, dest_dir), count) == index]
+    plan.dest_dirs = sorted({os.path.dirname(job.dest_path) for job in plan.pages + plan.static_files})
+
+
+def write_shard_manifest(shard_dir, index, count, digest, plan, dest_dir, template_path, manifest=None):
+    # Each output records its input's content hash, so the merge can check
+    # the shards against one digest of the full plan's inputs.
+    if manifest is None:
+        manifest = Manifest()
+    outputs = {}
+    for job in plan.pages + plan.static_files:
+        outputs[relative_output(job, dest_dir)] = {
+            "size": os.path.getsize(job.dest_path),
+            "sha256": file_hash(job.dest_path),
+            "input": manifest.input_hash(job.source_path, job.stat),
+        }
+    data = {
+        "version": SHARD_MANIFEST_VERSION,
+        "shard": index,
+        "count": count,
+        "plan": digest,
+        "template": manifest.input_hash(template_path, plan.template_stat),
+        "outputs": outputs,
+    }
+    path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    write_json_atomic(path, data, indent=1, sort_keys=True)
+    return path
+
+
+def load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    if not os.path.isfile(path):
+        raise ValueError(f"{shard_dir} has no {SHARD_MANIFEST_NAME}")
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data.get("version") != SHARD_MANIFEST_VERSION:
+        raise ValueError(f"{path} has an unsupported version")
+    return data
+
+
+def validate_shards(shard_dirs, inputs=None):
+    # Everything is checked before anything is copied, so a bad shard set
+    # never leaves a half-merged public/ behind. inputs, if given, is the
+    # inputs_digest of the tree being merged into.
+    if len(shard_dirs) == 0:
+        raise ValueError("no shards to merge")
+    manifests = [(shard_dir, load_shard_manifest(shard_dir)) for shard_dir in shard_dirs]
+    count = manifests[0][1]["count"]
+    digest = manifests[0][1]["plan"]
+    template = manifests[0][1]["template"]
+    shards = {}
+    outputs = {}
+    input_hashes = {}
+    for shard_dir, data in manifests:
+        index = data["shard"]
+        if data["count"] != count or data["plan"] != digest:
+            raise ValueError(f"{shard_dir} was built from a different plan than {shard_dirs[0]}")
+        if data["template"] != template:
+            raise ValueError(f"{shard_dir} was built with a different template than {shard_dirs[0]}")
+        if index in shards:
+            raise ValueError(f"shard {index}/{count} is in both {shards[index]} and {shard_dir}")
+        shards[index] = shard_dir
+        for rel_path, entry in data["outputs"].items():
+            if shard_of(rel_path, count) != index:
+                raise ValueError(f"{rel_path} in {shard_dir} belongs to another shard")
+            source_path = os.path.join(shard_public_dir(shard_dir), *rel_path.split("/"))
+            if (not os.path.isfile(source_path)
+                    or os.path.getsize(source_path) != entry["size"]
+                    or file_hash(source_path) != entry["sha256"]):
+                raise ValueError(f"{source_path} is missing or does not match its shard manifest")
+            outputs[rel_path] = source_path
+            input_hashes[rel_path] = entry["input"]
+
+    missing = [str(index) for index in range(1, count + 1) if index not in shards]
+    if len(missing) > 0:
+        raise ValueError(f"missing shard(s) {', '.join(missing)} of {count}")
+    if outputs_digest(outputs) != digest:
+        raise ValueError("the shards' outputs do not add up to the build plan")
+    if inputs is not None and combine_inputs(template, input_hashes) != inputs:
+        raise ValueError("the shards were built from different inputs than this tree")
+    return outputs
+
+
+def copy_shard_outputs(outputs, dest_dir, hardlink=False):
+    for rel_path, source_path in sorted(outputs.items()):
+        dest_path = os.path.join(dest_dir, *rel_path.split("/"))
+        output_writer.ensure_dir(os.path.dirname(dest_path))
+        fast_copy(source_path, dest_path, hardlink)
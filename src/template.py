@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+from htmlnode import escape_text
+
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class Template:
+    def __init__(self, literals, names, sources):
+        # literals has one more entry than names: literal, slot, literal, ...
+        self.literals = literals
+        self.names = names
+        self.sources = sources
+
+    @classmethod
+    def parse(cls, text):
+        literals = []
+        names = []
+        sources = []
+        start = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            literals.append(text[start:match.start()])
+            names.append(match[1])
+            sources.append(match[0])
+            start = match.end()
+        literals.append(text[start:])
+        return cls(literals, names, sources)
+
+    def render(self, context):
+        # str values are text and get escaped; markup goes in as an HTMLNode
+        # (RawNode for HTML that is already rendered).
+        parts = [self.literals[0]]
+        for name, source, literal in zip(self.names, self.sources, self.literals[1:]):
+            value = context.get(name, source)
+            if isinstance(value, str):
+                value = escape_text(value)
+            else:
+                value = value.to_html()
+            parts.append(value)
+            parts.append(literal)
+        return "".join(parts)
+
+    def write(self, stream, context):
+        stream.write(self.literals[0])
+        for name, source, literal in zip(self.names, self.sources, self.literals[1:]):
+            value = context.get(name, source)
+            if isinstance(value, str):
+                stream.write(escape_text(value))
+            else:
+                value.write_html(stream)
+            stream.write(literal)
+
+
+class TemplateCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, path, stat=None):
+        if stat is None:
+            stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry["stat"] == (stat.st_mtime_ns, stat.st_size):
+            return entry["template"]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry["hash"] == digest:
+            entry["stat"] = (stat.st_mtime_ns, stat.st_size)
+            return entry["template"]
+
+        template = Template.parse(data.decode("utf-8"))
+        self.entries[path] = {
+            "stat": (stat.st_mtime_ns, stat.st_size),
+            "hash": digest,
+            "template": template,
+        }
+        return template
+
+    def clear(self):
+        self.entries.clear()
+
+
+template_cache = TemplateCache()
+
+
+def load_template(path, stat=None):
+    return template_cache.get(path, stat)
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from async_build import generate_pages_async
+from generate import generate_pages_recursive
+from manifest import Manifest
+from parse_cache import ParseCache
+from plan import BuildPlan
+from testutil import TEMPLATE, read_tree, write_file
+
+
+class TestAsyncBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(20):
+            write_file(os.path.join(self.content, f"s{i % 4}", f"p{i}.md"),
+                       f"# Page {i}\n\n* item *{i}*\n\n[home](/)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def pages(self, dest):
+        plan = BuildPlan()
+        plan.add_pages(self.content, dest)
+        return plan.pages
+
+    def test_matches_serial_build(self):
+        serial = os.path.join(self.root, "serial")
+        pipelined = os.path.join(self.root, "async")
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, serial)
+            for concurrency in (1, 4):
+                errors = generate_pages_async(self.pages(pipelined), self.template, concurrency)
+                self.assertListEqual(errors, [])
+        self.assertDictEqual(read_tree(serial), read_tree(pipelined))
+
+    def test_rejects_no_concurrency(self):
+        for concurrency in (0, -1):
+            self.assertRaises(ValueError, generate_pages_async, self.pages(self.root), self.template, concurrency)
+
+    def test_errors_and_manifest(self):
+        bad = os.path.join(self.content, "bad.md")
+        write_file(bad, "no title")
+        dest = os.path.join(self.root, "public")
+        manifest = Manifest()
+        with redirect_stdout(StringIO()):
+            errors = generate_pages_async(self.pages(dest), self.template, 3, manifest)
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(errors[0][0], bad)
+            self.assertEqual(len(manifest.outputs), 20)
+            with redirect_stdout(StringIO()) as out:
+                generate_pages_async(self.pages(dest), self.template, 3, manifest)
+        self.assertEqual(out.getvalue().count("Generate page"), 1)
+
+    def test_parse_cache_is_shared_with_serial_builds(self):
+        serial = os.path.join(self.root, "serial")
+        pipelined = os.path.join(self.root, "async")
+        cache_dir = os.path.join(self.root, "cache")
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, serial)
+            cache = ParseCache(cache_dir)
+            self.assertListEqual(generate_pages_async(self.pages(pipelined), self.template, 4,
+                                                      parse_cache=cache), [])
+            self.assertEqual((cache.hits, cache.misses), (0, 20))
+            self.assertDictEqual(read_tree(serial), read_tree(pipelined))
+
+            cache = ParseCache(cache_dir)
+            generate_pages_recursive(self.content, self.template, serial, parse_cache=cache)
+            self.assertEqual((cache.hits, cache.misses), (20, 0))
+            cache = ParseCache(cache_dir)
+            generate_pages_async(self.pages(pipelined), self.template, 4, parse_cache=cache)
+            self.assertEqual((cache.hits, cache.misses), (20, 0))
+        self.assertDictEqual(read_tree(serial), read_tree(pipelined))
+
+
+if __name__ == "__main__":
+    unittest.main()
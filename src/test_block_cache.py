@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from block_cache import BlockCache
+from generate import generate_pages_parallel, generate_pages_recursive
+from htmlnode import RawNode
+from testutil import TEMPLATE, write_file
+from utils import markdown_to_html_node
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+MARKDOWN = "# Title\n\nSome **bold** text\n\n- one\n- two\n\nSome **bold** text\n\n> a < b"
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_same_html_as_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+
+    def test_counts_hits_and_misses(self):
+        cache = BlockCache()
+        markdown_to_html_node(MARKDOWN, cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+        markdown_to_html_node(MARKDOWN, cache)
+        self.assertEqual((cache.hits, cache.misses), (6, 4))
+        self.assertIn("6 hit(s), 4 miss(es)", cache.summary())
+
+    def test_node_is_raw(self):
+        node = BlockCache().node("a < b")
+        self.assertIsInstance(node, RawNode)
+        self.assertEqual(node.to_html(), "<p>a &lt; b</p>")
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(max_bytes=30)
+        cache.render("first")   # 5 + len("<p>first</p>") + 5 = 22
+        cache.render("second")  # 6 + 13 + 6 = 25, evicts "first"
+        self.assertEqual(len(cache.entries), 1)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, 30)
+        cache.render("first")
+        self.assertEqual(cache.misses, 3)
+
+    def test_skips_blocks_larger_than_the_cache(self):
+        cache = BlockCache(max_bytes=10)
+        self.assertEqual(cache.render("too long to cache"), "<p>too long to cache</p>")
+        self.assertEqual((len(cache.entries), cache.size), (0, 0))
+
+
+class TestBlockCacheBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(self.template, TEMPLATE)
+        for name in ("a", "b"):
+            write_file(os.path.join(self.content, f"{name}.md"), f"# {name}\n\nShared footer")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_serial_build(self):
+        cache = BlockCache()
+        public = os.path.join(self.root, "public")
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, public, block_cache=cache)
+        self.assertEqual(read_file(os.path.join(public, "a.html")),
+                         "<title>a</title><div><h1>a</h1><p>Shared footer</p></div>")
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_parallel_build_collects_counts(self):
+        cache = BlockCache()
+        public = os.path.join(self.root, "public")
+        with redirect_stdout(StringIO()):
+            errors = generate_pages_parallel(self.content, self.template, public, workers=1, block_cache=cache)
+        self.assertEqual(errors, [])
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(read_file(os.path.join(public, "b.html")),
+                         "<title>b</title><div><h1>b</h1><p>Shared footer</p></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+import manifest as manifest_module
+from compress import MIN_COMPRESS_SIZE, CompressStats, precompress_outputs
+from manifest import Manifest
+from testutil import write_file
+
+
+GZIP_ONLY = [("gzip", ".gz", lambda data: gzip.compress(data, mtime=0))]
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        self.page = self.path("public", "index.html")
+        write_file(self.page, "<p>hello</p>" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_gzip_sibling(self):
+        stats = precompress_outputs([self.page], encodings=GZIP_ONLY)
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), ("<p>hello</p>" * 100).encode())
+        self.assertEqual(stats.compressed, 1)
+        self.assertIn("gzip 0.00 MB -> 0.00 MB", stats.summary())
+
+    def test_skips_small_and_binary_outputs(self):
+        small = self.path("public", "small.css")
+        image = self.path("public", "image.png")
+        write_file(small, "a" * (MIN_COMPRESS_SIZE - 1))
+        write_file(image, "a" * 1000)
+        precompress_outputs([small, image, self.path("public", "missing.html")], encodings=GZIP_ONLY)
+        self.assertFalse(os.path.exists(small + ".gz"))
+        self.assertFalse(os.path.exists(image + ".gz"))
+
+    def test_unchanged_outputs_are_not_recompressed(self):
+        manifest = Manifest()
+        precompress_outputs([self.page], manifest, encodings=GZIP_ONLY)
+        stats = CompressStats()
+        precompress_outputs([self.page], manifest, stats=stats, encodings=GZIP_ONLY)
+        self.assertEqual((stats.compressed, stats.unchanged), (0, 1))
+
+        write_file(self.page, "<p>changed</p>" * 100)
+        stats = precompress_outputs([self.page], manifest, encodings=GZIP_ONLY)
+        self.assertEqual((stats.compressed, stats.unchanged), (1, 0))
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), ("<p>changed</p>" * 100).encode())
+
+    def test_removes_sibling_that_is_no_longer_smaller(self):
+        write_file(self.page + ".gz", "stale")
+        stats = precompress_outputs([self.page], encodings=[("copy", ".gz", lambda data: data)])
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertEqual(stats.not_smaller, 1)
+
+    def test_not_smaller_is_remembered(self):
+        manifest = Manifest()
+        copy = [("copy", ".gz", lambda data: data)]
+        precompress_outputs([self.page], manifest, encodings=copy)
+        stats = precompress_outputs([self.page], manifest, encodings=copy)
+        self.assertEqual((stats.not_smaller, stats.unchanged), (0, 1))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_uses_digest_from_the_write(self):
+        stat = os.stat(self.page)
+        digests = {self.page: [stat.st_size, stat.st_mtime_ns, manifest_module.file_hash(self.page)]}
+        manifest = Manifest()
+        with mock.patch("manifest.file_hash") as file_hash:
+            precompress_outputs([self.page], manifest, encodings=GZIP_ONLY, digests=digests)
+        file_hash.assert_not_called()
+        self.assertEqual(manifest.inputs[self.page]["hash"], digests[self.page][2])
+
+    def test_prune_removes_siblings_of_deleted_outputs(self):
+        manifest = Manifest()
+        precompress_outputs([self.page], manifest, encodings=GZIP_ONLY)
+        os.remove(self.page)
+        manifest.seen_outputs.clear()
+        manifest.seen_inputs.clear()
+        precompress_outputs([self.page], manifest, encodings=GZIP_ONLY)
+        self.assertEqual(manifest.prune(), [self.page + ".gz"])
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from copy_file import FAST_COPY_METHODS, SyncStats, copy_from_source_to_dest, fast_copy
+from testutil import write_file
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        write_file(os.path.join(self.static, "index.css"), b"body {}")
+        write_file(os.path.join(self.static, "images", "a.png"), b"\x89PNG" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, **kwargs):
+        stats = SyncStats()
+        copy_from_source_to_dest(self.static, self.public, stats=stats, **kwargs)
+        return stats
+
+    def test_unchanged_files_are_skipped(self):
+        stats = self.sync()
+        self.assertEqual((stats.copied_files, stats.copied_bytes), (2, 4007))
+        self.assertEqual(read_file(os.path.join(self.public, "images", "a.png")), b"\x89PNG" * 1000)
+
+        stats = self.sync()
+        self.assertEqual((stats.copied_files, stats.skipped_files, stats.skipped_bytes), (0, 2, 4007))
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        write_file(os.path.join(self.static, "index.css"), b"body { margin: 0 }")
+        stats = self.sync()
+        self.assertEqual((stats.copied_files, stats.skipped_files), (1, 1))
+        self.assertEqual(read_file(os.path.join(self.public, "index.css")), b"body { margin: 0 }")
+
+    def test_checksum_ignores_mtime(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(10**18, 10**18))
+        self.assertEqual(self.sync(checksum=True).copied_files, 0)
+        self.assertEqual(self.sync().copied_files, 1)
+
+    def test_hardlink(self):
+        stats = self.sync(hardlink=True)
+        self.assertEqual(stats.methods, {"hardlink": 2})
+        source_stat = os.stat(os.path.join(self.static, "index.css"))
+        dest_stat = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(source_stat.st_ino, dest_stat.st_ino)
+        self.assertEqual(self.sync(hardlink=True).skipped_files, 2)
+
+        # replacing a hardlinked output must not write through to static/
+        self.sync()
+        self.assertEqual(read_file(os.path.join(self.static, "index.css")), b"body {}")
+
+    def test_every_copy_method(self):
+        source_path = os.path.join(self.static, "images", "a.png")
+        dest_path = os.path.join(self.tmp.name, "copy.png")
+        size = os.path.getsize(source_path)
+        for method, copy in FAST_COPY_METHODS:
+            with open(source_path, "rb") as source_f, open(dest_path, "wb") as dest_f:
+                try:
+                    copy(source_f, dest_f, size)
+                except (OSError, AttributeError):
+                    continue
+            self.assertEqual(read_file(dest_path), read_file(source_path), method)
+        self.assertIn(fast_copy(source_path, dest_path), [method for method, _ in FAST_COPY_METHODS] + ["copy"])
+        self.assertEqual(os.stat(dest_path).st_mtime_ns, os.stat(source_path).st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
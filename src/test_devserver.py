@@ -0,0 +1,138 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from devserver import DevRequestHandler, SiteRenderer, accepts_gzip, make_server
+from testutil import TEMPLATE, write_file
+
+
+def touch_later(path, text):
+    # Moves mtime forward explicitly so the change is seen even on
+    # filesystems with coarse timestamps.
+    stat = os.stat(path)
+    write_file(path, text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestSiteRenderer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        write_file(self.path("template.html"), TEMPLATE)
+        write_file(self.path("content", "index.md"), "# Home\n\nhello")
+        write_file(self.path("content", "blog", "index.md"), "# Blog")
+        write_file(self.path("content", "blog", "post.md"), "# Post")
+        write_file(self.path("static", "index.css"), "body {}")
+        self.renderer = SiteRenderer(self.path("content"), self.path("static"), self.path("template.html"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find(self):
+        self.assertEqual(self.renderer.find("/"), ("page", self.path("content", "index.md")))
+        self.assertEqual(self.renderer.find("/blog/"), ("page", self.path("content", "blog", "index.md")))
+        self.assertEqual(self.renderer.find("/blog"), ("redirect", self.path("content", "blog", "index.md")))
+        self.assertEqual(self.renderer.find("/blog/post.html"), ("page", self.path("content", "blog", "post.md")))
+        self.assertEqual(self.renderer.find("/index.css"), ("static", self.path("static", "index.css")))
+        self.assertEqual(self.renderer.find("/missing"), (None, None))
+        self.assertEqual(self.renderer.find("/../template.html"), (None, None))
+
+    def test_renders_and_caches_pages(self):
+        resource = self.renderer.get("/")
+        self.assertEqual(resource.body, b"<title>Home</title><div><h1>Home</h1><p>hello</p></div>")
+        self.assertIs(self.renderer.get("/"), resource)
+        self.assertEqual((self.renderer.hits, self.renderer.misses), (1, 1))
+
+    def test_invalidates_on_source_change(self):
+        before = self.renderer.get("/")
+        touch_later(self.path("content", "index.md"), "# Home\n\nchanged")
+        after = self.renderer.get("/")
+        self.assertIn(b"changed", after.body)
+        self.assertNotEqual(before.etag, after.etag)
+
+    def test_invalidates_on_template_change(self):
+        self.renderer.get("/")
+        touch_later(self.path("template.html"), "<h6>{{ Title }}</h6>")
+        self.assertEqual(self.renderer.get("/").body, b"<h6>Home</h6>")
+
+    def test_evicts_least_recently_used(self):
+        renderer = SiteRenderer(self.path("content"), self.path("static"), self.path("template.html"),
+                                max_bytes=80)
+        renderer.get("/")
+        renderer.get("/blog/")
+        self.assertEqual(list(renderer.entries), [self.path("content", "blog", "index.md")])
+        self.assertLessEqual(renderer.size, 80)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.5"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("br"))
+        self.assertFalse(accepts_gzip(None))
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        write_file(path("template.html"), TEMPLATE)
+        write_file(path("content", "index.md"), "# Home\n\n" + "hello " * 200)
+        write_file(path("content", "blog", "index.md"), "# Blog\n\n[post](post.html)")
+        write_file(path("static", "index.css"), "body {}")
+        patcher = mock.patch.object(DevRequestHandler, "log_message", lambda *args: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        renderer = SiteRenderer(path("content"), path("static"), path("template.html"))
+        self.server = make_server(renderer, 0, workers=2, host="127.0.0.1")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def request(self, url, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        conn.request("GET", url, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_etag_and_304(self):
+        response, body = self.request("/index.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"body {}")
+        self.assertEqual(response.getheader("Content-Type"), "text/css; charset=utf-8")
+        etag = response.getheader("ETag")
+        response, body = self.request("/index.css", {"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        response, _ = self.request("/index.css", {"If-Modified-Since": response.getheader("Last-Modified")})
+        self.assertEqual(response.status, 304)
+
+    def test_gzip(self):
+        response, plain = self.request("/")
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        response, body = self.request("/", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertLess(len(body), len(plain))
+
+    def test_redirects_directory_without_slash(self):
+        response, body = self.request("/blog?x=1")
+        self.assertEqual((response.status, body), (301, b""))
+        self.assertEqual(response.getheader("Location"), "/blog/?x=1")
+        response, body = self.request("/blog/")
+        self.assertEqual(response.status, 200)
+        self.assertIn(b'href="post.html"', body)
+
+    def test_not_found(self):
+        response, _ = self.request("/nope")
+        self.assertEqual(response.status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from io import StringIO
+from unittest import mock
+import utils
+from block_cache import BlockCache
+from document import Heading, parse_document, slugify
+from utils import extract_title, markdown_to_html_node
+
+MARKDOWN = """# The *Hobbit*
+
+Intro with some words.
+
+## Chapter one
+
+- a list item
+
+### Part **A**
+
+## Chapter one
+
+```
+# not a heading
+```
+"""
+
+
+class TestParseDocument(unittest.TestCase):
+    def test_matches_separate_passes(self):
+        document = parse_document(MARKDOWN.split("\n"))
+        self.assertEqual(document.node.to_html(), markdown_to_html_node(MARKDOWN).to_html())
+        self.assertEqual(document.title, extract_title(MARKDOWN))
+        self.assertEqual(document.title, "The *Hobbit*")
+
+    def test_reads_from_a_file(self):
+        document = parse_document(StringIO(MARKDOWN))
+        self.assertEqual(document.node.to_html(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_outline_and_counts(self):
+        document = parse_document(MARKDOWN.split("\n"))
+        self.assertListEqual(document.headings, [
+            Heading(1, "The Hobbit", "the-hobbit"),
+            Heading(2, "Chapter one", "chapter-one"),
+            Heading(3, "Part A", "part-a"),
+            Heading(2, "Chapter one", "chapter-one-2"),
+        ])
+        self.assertEqual(document.block_count, 7)
+        self.assertEqual(document.word_count, 19)
+
+    def test_word_count_skips_markers(self):
+        document = parse_document(["# Two  words", "", "```python", "x = 1", "```", "",
+                                   ">  quoted   text", "> more", "", "1. one", "2. two"])
+        self.assertEqual(document.word_count, 2 + 3 + 3 + 2)
+
+    def test_heading_ids(self):
+        document = parse_document(["# Title", "", "## Sub section"], heading_ids=True)
+        self.assertEqual(document.node.to_html(),
+                         '<div><h1 id="title">Title</h1><h2 id="sub-section">Sub section</h2></div>')
+
+    def test_table_of_contents(self):
+        document = parse_document(MARKDOWN.split("\n"))
+        self.assertEqual(document.table_of_contents().to_html(),
+                         '<ul><li><a href="#chapter-one">Chapter one</a>'
+                         '<ul><li><a href="#part-a">Part A</a></li></ul></li>'
+                         '<li><a href="#chapter-one-2">Chapter one</a></li></ul>')
+
+    def test_block_cache(self):
+        cache = BlockCache()
+        document = parse_document(MARKDOWN.split("\n"), cache)
+        self.assertEqual(document.node.to_html(), markdown_to_html_node(MARKDOWN).to_html())
+        self.assertEqual(cache.misses, 6)
+
+    def test_block_text_with_block_cache(self):
+        texts = []
+        parse_document(MARKDOWN.split("\n"), on_text=texts.extend)
+        cached_texts = []
+        parse_document(MARKDOWN.split("\n"), BlockCache(), on_text=cached_texts.extend)
+        self.assertListEqual(cached_texts, texts)
+
+    def test_block_cache_renders_each_block_once_for_text(self):
+        lines = ["# Title", ""] + ["Some *repeated* text", ""] * 1000
+        with mock.patch("utils.text_to_textnodes", wraps=utils.text_to_textnodes) as lex:
+            parse_document(lines, BlockCache(), on_text=list)
+        self.assertEqual(lex.call_count, 2)
+
+    def test_no_title(self):
+        self.assertRaises(Exception, parse_document, ["## Only a subheading"])
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Hello, World!"), "hello-world")
+        self.assertEqual(slugify("!!!"), "section")
+
+
+if __name__ == "__main__":
+    unittest.main()
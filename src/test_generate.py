@@ -0,0 +1,166 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+from async_build import generate_pages_async
+from block_cache import BlockCache
+from devserver import SiteRenderer
+from generate import find_pages, generate_page, generate_pages_recursive, generate_pages_parallel
+from manifest import Manifest
+from parse_cache import ParseCache
+from plan import BuildPlan
+from profiling import BuildProfiler
+from testutil import TEMPLATE, read_tree, write_file
+from watch import SiteState
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(12):
+            write_file(os.path.join(self.content, f"section{i % 3}", f"page{i}.md"),
+                       f"# Page {i}\n\nSome **bold** text and a [link](/page{i})\n\n* one\n* two")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n> quote")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_pages(self):
+        pages = find_pages(self.content, "public")
+        self.assertEqual(len(pages), 13)
+        self.assertIn((os.path.join(self.content, "section1", "page4.md"),
+                       os.path.join("public", "section1", "page4.html")), pages)
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, serial)
+            errors = generate_pages_parallel(self.content, self.template, parallel, workers=4)
+        self.assertListEqual(errors, [])
+        self.assertDictEqual(read_tree(serial), read_tree(parallel))
+
+    def test_parallel_reports_errors_per_page(self):
+        bad_path = os.path.join(self.content, "bad.md")
+        write_file(bad_path, "no title here")
+        with redirect_stdout(StringIO()):
+            errors = generate_pages_parallel(self.content, self.template,
+                                             os.path.join(self.root, "public"), workers=2)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][0], bad_path)
+        self.assertIn("markdown has no h1 header", errors[0][1])
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "public", "index.html")))
+
+    def test_title_is_escaped(self):
+        write_file(os.path.join(self.content, "index.md"), "# Fish & <Chips>\n\ntext")
+        dest = os.path.join(self.root, "public", "index.html")
+        with redirect_stdout(StringIO()):
+            generate_page(os.path.join(self.content, "index.md"), self.template, dest)
+        with open(dest) as f:
+            self.assertEqual(f.read(), "<title>Fish &amp; &lt;Chips&gt;</title>"
+                                       "<div><h1>Fish &amp; &lt;Chips&gt;</h1><p>text</p></div>")
+
+    def test_planned_pages_stat_the_template_once(self):
+        stat = os.stat
+        stat_paths = []
+
+        def counting_stat(path, *args, **kwargs):
+            stat_paths.append(os.fsdecode(path))
+            return stat(path, *args, **kwargs)
+
+        with mock.patch("os.stat", counting_stat), redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "public"), Manifest())
+        self.assertEqual(stat_paths.count(self.template), 1)
+        self.assertListEqual([path for path in stat_paths if path.endswith(".md")], [])
+
+
+class TestBuildModesAgree(unittest.TestCase):
+    # Every way of building a page has to pick the same title and fail on
+    # the same pages.
+    PAGES = {
+        "plain.md": "# Plain\n\nSome **bold** text\n\n- a\n- b",
+        "late.md": "Intro line\n# not a heading\n\n# Real & <Title>\n\nbody",
+        "fenced.md": "```\n# in code\n```\n\n# Fenced",
+        "broken.md": "Just text\n# Title only mid-paragraph",
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        self.content = self.path("content")
+        self.template = self.path("template.html")
+        write_file(self.template, TEMPLATE)
+        for name, text in self.PAGES.items():
+            write_file(os.path.join(self.content, name), text)
+        os.makedirs(self.path("static"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_each_page(self, dest, **kwargs):
+        failed = set()
+        for name in self.PAGES:
+            try:
+                generate_page(os.path.join(self.content, name), self.template,
+                              os.path.join(dest, name[:-3] + ".html"), **kwargs)
+            except Exception:
+                failed.add(name)
+        return failed
+
+    def failed_names(self, errors):
+        return {os.path.basename(content_path) for content_path, _ in errors}
+
+    def test_every_mode_builds_the_same_pages(self):
+        results = {}
+        with redirect_stdout(StringIO()):
+            for mode, kwargs in [("serial", {}),
+                                 ("parse-cache", {"parse_cache": ParseCache(self.path("cache"))}),
+                                 ("parse-cache-hit", {"parse_cache": ParseCache(self.path("cache"))}),
+                                 ("block-cache", {"block_cache": BlockCache()}),
+                                 ("profile", {"profiler": BuildProfiler(trace_allocations=False)})]:
+                failed = self.build_each_page(self.path(mode), **kwargs)
+                results[mode] = (failed, read_tree(self.path(mode)))
+
+            errors = generate_pages_parallel(self.content, self.template, self.path("jobs"), workers=2)
+            results["jobs"] = (self.failed_names(errors), read_tree(self.path("jobs")))
+
+            plan = BuildPlan()
+            plan.add_pages(self.content, self.path("async"))
+            errors = generate_pages_async(plan.pages, self.template, 2)
+            results["async"] = (self.failed_names(errors), read_tree(self.path("async")))
+
+            SiteState(self.content, self.path("static"), self.template, self.path("watch")).build_all()
+            results["watch"] = ({name for name in self.PAGES
+                                 if not os.path.exists(self.path("watch", name[:-3] + ".html"))},
+                                read_tree(self.path("watch")))
+
+        renderer = SiteRenderer(self.content, self.path("static"), self.template)
+        failed, outputs = set(), {}
+        for name in self.PAGES:
+            try:
+                resource = renderer.render_page(os.path.join(self.content, name), 0)
+                outputs[name[:-3] + ".html"] = resource.body.decode()
+            except Exception:
+                failed.add(name)
+        results["devserver"] = (failed, outputs)
+
+        serial_failed, serial_outputs = results["serial"]
+        self.assertSetEqual(serial_failed, {"broken.md"})
+        self.assertEqual(serial_outputs["late.html"],
+                         "<title>Real &amp; &lt;Title&gt;</title><div><p>Intro line # not a heading</p>"
+                         "<h1>Real &amp; &lt;Title&gt;</h1><p>body</p></div>")
+        self.assertTrue(serial_outputs["fenced.html"].startswith("<title>Fenced</title>"))
+        for mode, (failed, outputs) in results.items():
+            with self.subTest(mode=mode):
+                self.assertSetEqual(failed, serial_failed)
+                self.assertDictEqual(outputs, serial_outputs)
+
+
+if __name__ == "__main__":
+    unittest.main()
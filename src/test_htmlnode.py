@@ -1,5 +1,6 @@
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from io import StringIO
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_attribute, escape_text
 
 class TestHTMLNode(unittest.TestCase):
     def test_props_to_html(self):
@@ -24,6 +25,27 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode("a")
         self.assertEqual(node.props_to_html(), "")
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode("a", props={"href": "/?a=1&b=\"2\"", "title": "it's <b>"})
+        self.assertEqual(node.props_to_html(),
+                         ' href="/?a=1&amp;b=&quot;2&quot;" title="it&#x27;s &lt;b&gt;"')
+
+
+class TestEscape(unittest.TestCase):
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a < b && c > d"), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(escape_text("&lt;"), "&amp;lt;")
+        self.assertEqual(escape_text("\"quoted\" 'text'"), "\"quoted\" 'text'")
+
+    def test_escape_clean_string_is_unchanged(self):
+        text = "nothing to escape here"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute("\"'<&>"), "&quot;&#x27;&lt;&amp;&gt;")
+        self.assertEqual(escape_attribute(3), "3")
+
 
 class TestLeafNode(unittest.TestCase):
     def test_to_html(self):
@@ -34,6 +56,10 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("a", "Click me!", {"href": "https://www.google.com"})
         self.assertEqual(node.to_html(), '<a href="https://www.google.com">Click me!</a>')
 
+    def test_to_html_escapes_value(self):
+        self.assertEqual(LeafNode("code", "if a < b & c:").to_html(), "<code>if a &lt; b &amp; c:</code>")
+        self.assertEqual(LeafNode(None, "<script>").to_html(), "&lt;script&gt;")
+
 
 class TestParentNode(unittest.TestCase):
     def test_to_html(self):
@@ -48,3 +74,36 @@ class TestParentNode(unittest.TestCase):
         )
         self.assertEqual(node.to_html(), '<p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p>')
 
+    def test_iter_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+            LeafNode("code", "x"),
+        ])
+        chunks = list(node.iter_html())
+        self.assertListEqual(chunks, ["<div>", "<p>", "<b>Bold</b>", " text", "</p>", "<code>x</code>", "</div>"])
+        self.assertEqual(node.to_html(), "".join(chunks))
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")]),
+                                 ParentNode("li", [LeafNode("i", "two")])])
+        stream = StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), "<ul><li>one</li><li><i>two</i></li></ul>")
+
+    def test_to_html_deep_nesting(self):
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + 1)
+
+    def test_to_html_invalid_child(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        self.assertRaises(ValueError, node.to_html)
+        node = ParentNode(None, [LeafNode(None, "x")])
+        self.assertRaises(ValueError, node.to_html)
+
+    def test_to_html_renders_props(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "x")], {"class": "a&b"})], {"id": "top"})
+        self.assertEqual(node.to_html(), '<div id="top"><p class="a&amp;b">x</p></div>')
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from async_build import generate_pages_async
+from block_cache import BlockCache
+from generate import generate_planned_pages, generate_planned_pages_parallel
+from links import LinkIndex, page_links, resolve_internal
+from parse_cache import ParseCache
+from plan import make_build_plan
+from profiling import BuildProfiler
+from testutil import TEMPLATE, write_file
+
+
+class TestPageLinks(unittest.TestCase):
+    def test_page_links(self):
+        lines = [
+            "# Title",
+            "",
+            "See [home](/) and",
+            "[the post](blog/post.html).",
+            "",
+            "![logo](/images/logo.png)",
+            "",
+            "`[not a link](/nowhere)`",
+        ]
+        self.assertListEqual(page_links(lines), [
+            (3, "a", "/"),
+            (4, "a", "blog/post.html"),
+            (6, "img", "/images/logo.png"),
+        ])
+
+    def test_list_items(self):
+        lines = ["- [a](/a)", "- [b](/b)"]
+        self.assertListEqual(page_links(lines), [(1, "a", "/a"), (2, "a", "/b")])
+
+    def test_resolve_internal(self):
+        self.assertEqual(resolve_internal("/blog/index.html", "post.html"), "/blog/post.html")
+        self.assertEqual(resolve_internal("/blog/index.html", "../images/a.png?x=1#top"), "/images/a.png")
+        self.assertEqual(resolve_internal("/index.html", "/majesty/"), "/majesty/")
+        self.assertEqual(resolve_internal("/index.html", "/a%20b.html"), "/a b.html")
+        self.assertIsNone(resolve_internal("/index.html", "https://example.com/x"))
+        self.assertIsNone(resolve_internal("/index.html", "mailto:me@example.com"))
+        self.assertIsNone(resolve_internal("/index.html", "#section"))
+
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        write_file(self.path("content", "index.md"),
+                   "# Home\n\n[blog](/blog) [post](/blog/post.html) [gone](/gone)\n\n![x](/images/x.png)")
+        write_file(self.path("content", "blog", "index.md"), "# Blog\n\n[up](../) [post](post.html)")
+        write_file(self.path("content", "blog", "post.md"), "# Post\n\n[ext](https://example.com)\n\n![y](y.png)")
+        write_file(self.path("static", "images", "x.png"), "")
+        write_file(self.path("template.html"), TEMPLATE)
+        self.plan = make_build_plan(self.path("content"), self.path("static"), self.path("public"),
+                                    self.path("template.html"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_check_reports_broken_links(self):
+        index = LinkIndex.build(self.plan, self.path("public"))
+        self.assertEqual(index.link_count(), 8)
+        self.assertListEqual(sorted(index.check()), [
+            (self.path("content", "blog", "post.md"), 5, "img", "y.png"),
+            (self.path("content", "index.md"), 3, "a", "/gone"),
+        ])
+
+    def test_save_and_load(self):
+        index = LinkIndex.build(self.plan, self.path("public"))
+        index.save(self.path("cache", "links.json"))
+        loaded = LinkIndex.load(self.path("cache", "links.json"))
+        self.assertEqual(loaded.pages, index.pages)
+        self.assertEqual(loaded.targets, index.targets)
+        self.assertEqual(loaded.check(), index.check())
+
+    def test_every_mode_collects_the_same_links_without_reading_again(self):
+        expected = LinkIndex.build(self.plan, self.path("public"))
+        self.assertEqual(expected.read, 3)
+        template = self.path("template.html")
+        builds = {
+            "serial": lambda index: generate_planned_pages(self.plan.pages, template, link_index=index),
+            "block-cache": lambda index: generate_planned_pages(
+                self.plan.pages, template, block_cache=BlockCache(), link_index=index),
+            "parse-cache": lambda index: generate_planned_pages(
+                self.plan.pages, template, parse_cache=ParseCache(self.path("cache")), link_index=index),
+            "profile": lambda index: generate_planned_pages(
+                self.plan.pages, template, profiler=BuildProfiler(trace_allocations=False), link_index=index),
+            "jobs": lambda index: generate_planned_pages_parallel(
+                self.plan.pages, template, 2, block_cache=BlockCache(), link_index=index),
+            "async": lambda index: generate_pages_async(self.plan.pages, template, 2, link_index=index),
+        }
+        for mode, generate in builds.items():
+            with self.subTest(mode):
+                index = LinkIndex()
+                with redirect_stdout(StringIO()):
+                    generate(index)
+                index.update(self.plan, self.path("public"))
+                self.assertEqual((index.indexed, index.read), (3, 0))
+                self.assertDictEqual(index.pages, expected.pages)
+
+    def test_saved_index_skips_unchanged_pages(self):
+        LinkIndex.build(self.plan, self.path("public")).save(self.path("cache", "links.json"))
+        write_file(self.path("content", "blog", "post.md"), "# Post\n\n[home](/)")
+        plan = make_build_plan(self.path("content"), self.path("static"), self.path("public"))
+        index = LinkIndex.load(self.path("cache", "links.json"))
+        index.update(plan, self.path("public"))
+        self.assertEqual((index.read, index.reused), (1, 2))
+        self.assertListEqual(index.pages["/blog/post.html"]["links"], [[3, "a", "/"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from copy_file import copy_from_source_to_dest
+from generate import generate_pages_recursive
+from manifest import Manifest
+from testutil import TEMPLATE, write_file
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        write_file(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nposts")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        manifest = Manifest.load(self.manifest_path)
+        out = StringIO()
+        with redirect_stdout(out):
+            copy_from_source_to_dest(self.static, self.public, manifest)
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        removed = manifest.prune()
+        manifest.save()
+        return out.getvalue().count("Generate page"), removed
+
+    def test_input_hash_is_cached_by_stat(self):
+        manifest = Manifest()
+        path = os.path.join(self.static, "index.css")
+        digest = manifest.input_hash(path)
+        self.assertEqual(manifest.input_hash(path), digest)
+        self.assertEqual(manifest.inputs[path]["size"], len("body {}"))
+
+    def test_second_build_skips_everything(self):
+        self.assertEqual(self.build(), (2, []))
+        self.assertEqual(self.build(), (0, []))
+        with open(os.path.join(self.public, "blog", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Blog</title><div><h1>Blog</h1><p>posts</p></div>")
+
+    def test_changed_page_is_rebuilt(self):
+        self.build()
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nchanged text")
+        self.assertEqual(self.build(), (1, []))
+
+    def test_changed_template_rebuilds_all_pages(self):
+        self.build()
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build(), (2, []))
+
+    def test_removed_sources_are_pruned(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        generated, removed = self.build()
+        self.assertEqual(generated, 0)
+        self.assertListEqual(sorted(removed), sorted([
+            os.path.join(self.public, "blog", "index.html"),
+            os.path.join(self.public, "index.css"),
+        ]))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+
+    def test_deleted_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual(self.build(), (1, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from output import OutputWriter, sweep_temp_files
+from testutil import write_file
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "public", "blog", "index.html")
+        self.writer = OutputWriter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        with self.writer.open(self.dest) as f:
+            f.write(text)
+
+    def read(self):
+        with open(self.dest) as f:
+            return f.read()
+
+    def test_write_creates_dirs_once(self):
+        self.write("<p>one</p>")
+        self.assertEqual(self.read(), "<p>one</p>")
+        self.assertIn(os.path.dirname(self.dest), self.writer.created_dirs)
+        self.assertListEqual(os.listdir(os.path.dirname(self.dest)), ["index.html"])
+
+    def test_identical_write_keeps_mtime(self):
+        self.write("<p>one</p>")
+        os.utime(self.dest, ns=(10**18, 10**18))
+        self.write("<p>one</p>")
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 10**18)
+        self.write("<p>two</p>")
+        self.assertNotEqual(os.stat(self.dest).st_mtime_ns, 10**18)
+        self.assertEqual(self.read(), "<p>two</p>")
+        self.assertEqual((self.writer.written, self.writer.unchanged), (2, 1))
+
+    def test_unchanged_output_is_not_read_back(self):
+        self.write("<p>one</p>")
+        with mock.patch("output.file_hash") as file_hash:
+            self.write("<p>one</p>")
+            self.write("<p>two!</p>")
+        file_hash.assert_not_called()
+        self.assertEqual((self.writer.written, self.writer.unchanged), (2, 1))
+
+    def test_saved_digests_carry_over_to_the_next_build(self):
+        digests_path = os.path.join(self.tmp.name, "outputs.json")
+        self.write("<p>one</p>")
+        self.writer.save_digests(digests_path)
+
+        self.writer = OutputWriter()
+        self.writer.load_digests(digests_path)
+        with mock.patch("output.file_hash") as file_hash:
+            self.write("<p>one</p>")
+        file_hash.assert_not_called()
+        self.assertEqual(self.writer.unchanged, 1)
+
+        # An output the writer knows nothing about is hashed once to compare.
+        self.writer = OutputWriter()
+        os.utime(self.dest, ns=(10**18, 10**18))
+        self.write("<p>one</p>")
+        self.assertEqual(self.writer.unchanged, 1)
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 10**18)
+
+    def test_binary_output_is_hashed(self):
+        with self.writer.open(self.dest, "wb") as f:
+            f.write(b"\x00" * 5000)
+        with self.writer.open(self.dest, "wb") as f:
+            f.write(b"\x00" * 5000)
+        self.assertEqual((self.writer.written, self.writer.unchanged), (1, 1))
+
+    def test_sweep_temp_files(self):
+        self.write("<p>one</p>")
+        dir_path = os.path.dirname(self.dest)
+        leftover = os.path.join(dir_path, ".index.html.4242.7.tmp")
+        write_file(leftover, "<p>par")
+        write_file(os.path.join(dir_path, ".well-known.tmp"), "kept")
+        self.assertListEqual(sweep_temp_files(self.tmp.name), [leftover])
+        self.assertListEqual(sorted(os.listdir(dir_path)), [".well-known.tmp", "index.html"])
+
+    def test_failed_write_keeps_old_file(self):
+        self.write("<p>one</p>")
+        with self.assertRaises(ValueError):
+            with self.writer.open(self.dest) as f:
+                f.write("<p>partial")
+                raise ValueError("render failed")
+        self.assertEqual(self.read(), "<p>one</p>")
+        self.assertListEqual(os.listdir(os.path.dirname(self.dest)), ["index.html"])
+
+    def test_recreates_removed_dir(self):
+        self.write("<p>one</p>")
+        os.remove(self.dest)
+        os.rmdir(os.path.dirname(self.dest))
+        self.write("<p>again</p>")
+        self.assertEqual(self.read(), "<p>again</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from generate import generate_page, generate_pages_parallel
+from parse_cache import ParseCache
+from testutil import TEMPLATE, write_file
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.template = os.path.join(self.root, "template.html")
+        self.page = os.path.join(self.root, "content", "index.md")
+        write_file(self.template, TEMPLATE)
+        write_file(self.page, "# Home\n\nSome *text*")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_and_put(self):
+        cache = ParseCache(self.cache_dir)
+        key = cache.key_for_file(self.page)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "Home", "<div></div>")
+        self.assertEqual(cache.get(key), ("Home", "<div></div>"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_depends_on_parser_version(self):
+        cache = ParseCache(self.cache_dir)
+        key = cache.key_for_file(self.page)
+        cache.version = "other"
+        self.assertNotEqual(cache.key_for_file(self.page), key)
+
+    def test_generate_page_uses_cache(self):
+        cache = ParseCache(self.cache_dir)
+        dest = os.path.join(self.root, "public", "index.html")
+        with redirect_stdout(StringIO()):
+            generate_page(self.page, self.template, dest)
+            expected = read_file(dest)
+            generate_page(self.page, self.template, dest, parse_cache=cache)
+            self.assertEqual(read_file(dest), expected)
+            write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+            generate_page(self.page, self.template, dest, parse_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(read_file(dest), "<h1>Home</h1><div><h1>Home</h1><p>Some <i>text</i></p></div>")
+
+    def test_parallel_counts_hits(self):
+        cache = ParseCache(self.cache_dir)
+        content = os.path.dirname(self.page)
+        with redirect_stdout(StringIO()):
+            for _ in range(2):
+                errors = generate_pages_parallel(content, self.template, os.path.join(self.root, "public"),
+                                                 workers=2, parse_cache=cache)
+                self.assertListEqual(errors, [])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evict_least_recently_used(self):
+        cache = ParseCache(self.cache_dir, max_bytes=0)
+        for i, key in enumerate(["aa01", "bb02", "cc03"]):
+            cache.put(key, "t", "x" * 100)
+            os.utime(cache.entry_path(key), ns=(i * 10**9, i * 10**9))
+        size = os.path.getsize(cache.entry_path("aa01"))
+        cache.max_bytes = size * 2
+        cache.get("aa01")
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("bb02"))
+        self.assertIsNotNone(cache.get("aa01"))
+        self.assertIsNotNone(cache.get("cc03"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from plan import BuildPlan, make_build_plan
+from testutil import write_file
+
+
+class TestBuildPlan(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        write_file(self.path("content", "index.md"), "# Home")
+        write_file(self.path("content", "blog", "post.md"), "# Post")
+        write_file(self.path("content", "blog", "notes.txt"), "not a page")
+        os.makedirs(self.path("content", "drafts"))
+        write_file(self.path("static", "index.css"), "body {}")
+        write_file(self.path("static", "images", "a.png"), "png")
+        os.makedirs(self.path("static", "empty"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_make_build_plan(self):
+        plan = make_build_plan(self.path("content"), self.path("static"), self.path("public"))
+        pages = sorted((job.source_path, job.dest_path) for job in plan.pages)
+        self.assertListEqual(pages, [
+            (self.path("content", "blog", "post.md"), self.path("public", "blog", "post.html")),
+            (self.path("content", "index.md"), self.path("public", "index.html")),
+        ])
+        static = sorted(job.dest_path for job in plan.static_files)
+        self.assertListEqual(static, [self.path("public", "images", "a.png"), self.path("public", "index.css")])
+        self.assertEqual(plan.static_files[0].stat.st_size, os.path.getsize(plan.static_files[0].source_path))
+
+    def test_make_dest_dirs(self):
+        plan = BuildPlan()
+        plan.add_pages(self.path("content"), self.path("public"))
+        plan.add_static(self.path("static"), self.path("public"))
+        plan.make_dest_dirs()
+        self.assertTrue(os.path.isdir(self.path("public", "blog")))
+        self.assertTrue(os.path.isdir(self.path("public", "empty")))
+        self.assertFalse(os.path.exists(self.path("public", "drafts")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from generate import generate_page
+from profiling import BuildProfiler
+from testutil import TEMPLATE
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        self.pages = []
+        for i, size in enumerate([1, 200]):
+            path = os.path.join(self.root, f"page{i}.md")
+            with open(path, "w") as f:
+                f.write("# Title\n\n" + "\n\n".join(f"Para **{j}** [l](/x)" for j in range(size)))
+            self.pages.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_profiled_page_matches_streamed_page(self):
+        profiler = BuildProfiler(trace_allocations=False)
+        plain = os.path.join(self.root, "out", "plain.html")
+        profiled = os.path.join(self.root, "out", "profiled.html")
+        with redirect_stdout(StringIO()):
+            generate_page(self.pages[1], self.template, plain)
+            generate_page(self.pages[1], self.template, profiled, profiler)
+        with open(plain) as a, open(profiled) as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertListEqual(list(profiler.pages[0].stages),
+                             ["read", "blocks", "classify", "inline", "title", "to_html", "render", "write"])
+
+    def test_report(self):
+        profiler = BuildProfiler()
+        profiler.start()
+        with redirect_stdout(StringIO()):
+            for i, path in enumerate(self.pages):
+                generate_page(path, self.template, os.path.join(self.root, "out", f"{i}.html"), profiler)
+        profiler.stop()
+
+        report_path = os.path.join(self.root, "report", "profile.json")
+        profiler.write_json(report_path, top=1)
+        with open(report_path) as f:
+            report = json.load(f)
+        self.assertEqual(report["page_count"], 2)
+        self.assertEqual(report["slowest_pages"][0]["path"], self.pages[1])
+        self.assertGreater(report["stages"]["inline"]["alloc_bytes"], 0)
+
+        out = StringIO()
+        profiler.print_summary(file=out)
+        self.assertIn("Slowest pages:", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
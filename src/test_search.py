@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from async_build import generate_pages_async
+from block_cache import BlockCache
+from generate import generate_planned_pages, generate_planned_pages_parallel
+from parse_cache import ParseCache
+from plan import make_build_plan
+from profiling import BuildProfiler
+from search import SearchIndex, count_terms, page_text, shard_key
+from testutil import TEMPLATE, write_file
+from utils import markdown_to_html_node
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class TestTerms(unittest.TestCase):
+    def test_page_text(self):
+        node = markdown_to_html_node("# Title\n\nSome **bold** [link](/x)\n\n![alt text](/y.png)")
+        self.assertListEqual(list(page_text(node)), ["Title", "Some ", "bold", " ", "link", "alt text"])
+
+    def test_count_terms(self):
+        self.assertDictEqual(count_terms(["The cat, the HAT", "a cat"]), {"the": 2, "cat": 2, "hat": 1})
+
+    def test_shard_key(self):
+        self.assertEqual(shard_key("tolkien"), "t")
+        self.assertEqual(shard_key("42"), "4")
+        self.assertEqual(shard_key("éowyn"), "_")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        write_file(self.path("content", "index.md"), "# Home\n\nWelcome to the shire")
+        write_file(self.path("content", "blog", "post.md"), "# Shire post\n\nshire shire")
+        os.makedirs(self.path("static"))
+        self.cache = self.path("cache", "search.json")
+        self.out = self.path("public", "search")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        plan = make_build_plan(self.path("content"), self.path("static"), self.path("public"))
+        index = SearchIndex.load(self.cache)
+        index.update(plan, self.path("public"))
+        index.write(self.out)
+        index.save()
+        return index
+
+    def test_writes_sharded_index(self):
+        self.build()
+        self.assertListEqual(read_json(os.path.join(self.out, "pages.json")),
+                             [["/", "Home"], ["/blog/post.html", "Shire post"]])
+        self.assertDictEqual(read_json(os.path.join(self.out, "terms-s.json")), {"shire": [0, 1, 1, 3]})
+        meta = read_json(os.path.join(self.out, "index.json"))
+        self.assertEqual(meta["pages"], 2)
+        self.assertListEqual(meta["shards"], ["h", "p", "s", "t", "w"])
+
+    def test_incremental_update(self):
+        index = self.build()
+        self.assertEqual((index.indexed, index.reused), (2, 0))
+        index = self.build()
+        self.assertEqual((index.indexed, index.reused), (0, 2))
+
+        write_file(self.path("content", "index.md"), "# Home\n\nGone elsewhere")
+        os.remove(self.path("content", "blog", "post.md"))
+        index = self.build()
+        self.assertEqual((index.indexed, index.reused), (1, 0))
+        self.assertListEqual(read_json(os.path.join(self.out, "pages.json")), [["/", "Home"]])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "terms-s.json")))
+        self.assertIn("elsewhere", read_json(os.path.join(self.out, "terms-e.json")))
+
+    def test_keeps_other_files_in_the_output_dir(self):
+        self.build()
+        write_file(os.path.join(self.out, "terms-s.json.gz"), b"")
+        write_file(os.path.join(self.out, "terms-zz.json"), "{}")
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.out, "terms-s.json.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "terms-zz.json")))
+
+    def test_skips_pages_that_fail_to_parse(self):
+        write_file(self.path("content", "bad.md"), "no title here")
+        with redirect_stdout(StringIO()):
+            index = self.build()
+        self.assertEqual(len(index.pages), 2)
+
+
+class TestIndexWhileGenerating(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = lambda *parts: os.path.join(self.tmp.name, *parts)
+        self.template = self.path("template.html")
+        write_file(self.template, TEMPLATE)
+        write_file(self.path("content", "index.md"),
+                   "# Home\n\nWelcome to the **shire**\n\n![hobbit hole](/h.png)")
+        write_file(self.path("content", "blog", "post.md"),
+                   "# Shire post\n\n- shire\n- shire\n\n```\ncode_word\n```")
+        os.makedirs(self.path("static"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def index(self, generate):
+        plan = make_build_plan(self.path("content"), self.path("static"), self.path("public"), self.template)
+        index = SearchIndex()
+        with redirect_stdout(StringIO()):
+            generate(plan, index)
+            index.update(plan, self.path("public"))
+        return index
+
+    def test_every_mode_counts_the_same_terms_without_reading_again(self):
+        expected = self.index(lambda plan, index: None)
+        self.assertEqual(expected.read, 2)
+        builds = {
+            "serial": lambda plan, index: generate_planned_pages(
+                plan.pages, self.template, search_index=index),
+            "block-cache": lambda plan, index: generate_planned_pages(
+                plan.pages, self.template, block_cache=BlockCache(), search_index=index),
+            "parse-cache": lambda plan, index: generate_planned_pages(
+                plan.pages, self.template, parse_cache=ParseCache(self.path("cache")), search_index=index),
+            "profile": lambda plan, index: generate_planned_pages(
+                plan.pages, self.template, profiler=BuildProfiler(trace_allocations=False),
+                search_index=index),
+            "jobs": lambda plan, index: generate_planned_pages_parallel(
+                plan.pages, self.template, 2, block_cache=BlockCache(), search_index=index),
+            "async": lambda plan, index: generate_pages_async(
+                plan.pages, self.template, 2, search_index=index),
+        }
+        for mode, generate in builds.items():
+            with self.subTest(mode):
+                index = self.index(generate)
+                self.assertEqual((index.indexed, index.read), (2, 0))
+                self.assertDictEqual(index.pages, expected.pages)
+
+    def test_parse_cache_hit_is_read_again(self):
+        cache = ParseCache(self.path("cache"))
+        self.index(lambda plan, index: generate_planned_pages(plan.pages, self.template, parse_cache=cache))
+        index = self.index(lambda plan, index: generate_planned_pages(
+            plan.pages, self.template, parse_cache=cache, search_index=index))
+        self.assertEqual((index.indexed, index.read), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+import manifest
+from copy_file import copy_planned_files
+from generate import generate_planned_pages
+from plan import make_build_plan
+from shard import (SHARD_MANIFEST_NAME, copy_shard_outputs, inputs_digest, parse_shard, plan_digest,
+                   select_shard, shard_of, shard_public_dir, validate_shards, write_shard_manifest)
+from testutil import TEMPLATE, write_file
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestShardPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1/0", "4", "a/b", "-1/2"):
+            self.assertRaises(ValueError, parse_shard, text)
+
+    def test_shard_of_is_deterministic_and_in_range(self):
+        paths = [f"blog/post{i}.html" for i in range(200)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertEqual({shard_of(path, 1) for path in paths}, {1})
+
+
+class TestShardBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(12):
+            write_file(os.path.join(self.content, f"d{i % 3}", f"page{i}.md"), f"# Page {i}\n\nText {i}")
+        write_file(os.path.join(self.static, "css", "site.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_shard(self, index, count):
+        shard_dir = os.path.join(self.root, "shards", f"{index}-of-{count}")
+        dest_dir = shard_public_dir(shard_dir)
+        plan = make_build_plan(self.content, self.static, dest_dir, self.template)
+        digest = plan_digest(plan, dest_dir)
+        select_shard(plan, index, count, dest_dir)
+        plan.make_dest_dirs()
+        copy_planned_files(plan.static_files)
+        with redirect_stdout(StringIO()):
+            generate_planned_pages(plan.pages, self.template)
+        write_shard_manifest(shard_dir, index, count, digest, plan, dest_dir, self.template)
+        return shard_dir
+
+    def tree_inputs(self):
+        dest_dir = os.path.join(self.root, "public")
+        plan = make_build_plan(self.content, self.static, dest_dir, self.template)
+        return inputs_digest(plan, dest_dir, self.template)
+
+    def test_shards_partition_outputs(self):
+        shard_dirs = [self.build_shard(i, 3) for i in (1, 2, 3)]
+        outputs = validate_shards(shard_dirs, self.tree_inputs())
+        self.assertEqual(len(outputs), 13)
+        public = os.path.join(self.root, "public")
+        copy_shard_outputs(outputs, public)
+        self.assertEqual(read_file(os.path.join(public, "d1", "page4.html")),
+                         "<title>Page 4</title><div><h1>Page 4</h1><p>Text 4</p></div>")
+        self.assertEqual(read_file(os.path.join(public, "css", "site.css")), "body {}")
+
+    def test_missing_shard(self):
+        shard_dirs = [self.build_shard(i, 3) for i in (1, 3)]
+        with self.assertRaisesRegex(ValueError, "missing shard"):
+            validate_shards(shard_dirs)
+
+    def test_duplicate_shard(self):
+        shard_dir = self.build_shard(1, 1)
+        with self.assertRaisesRegex(ValueError, "is in both"):
+            validate_shards([shard_dir, shard_dir])
+
+    def test_different_plans(self):
+        first = self.build_shard(1, 2)
+        write_file(os.path.join(self.content, "new.md"), "# New")
+        second = self.build_shard(2, 2)
+        with self.assertRaisesRegex(ValueError, "different plan"):
+            validate_shards([first, second])
+
+    def test_different_inputs(self):
+        first = self.build_shard(1, 2)
+        second = self.build_shard(2, 2)
+        # a page whose output is in the first shard, edited after it was built
+        page = next(i for i in range(12) if shard_of(f"d{i % 3}/page{i}.html", 2) == 1)
+        write_file(os.path.join(self.content, f"d{page % 3}", f"page{page}.md"), "# Edited")
+        with self.assertRaisesRegex(ValueError, "different inputs"):
+            validate_shards([first, second], self.tree_inputs())
+
+    def test_shard_hashes_only_its_own_inputs(self):
+        with mock.patch("manifest.file_hash", wraps=manifest.file_hash) as file_hash:
+            shard_dir = self.build_shard(1, 2)
+        with open(os.path.join(shard_dir, SHARD_MANIFEST_NAME)) as f:
+            outputs = json.load(f)["outputs"]
+        hashed = {os.path.relpath(call.args[0], self.root) for call in file_hash.call_args_list}
+        sources = [self.template]
+        for rel_path in outputs:
+            if rel_path.endswith(".html"):
+                sources.append(os.path.join(self.content, rel_path[:-5] + ".md"))
+            else:
+                sources.append(os.path.join(self.static, rel_path))
+        self.assertSetEqual(hashed, {os.path.relpath(path, self.root) for path in sources})
+        self.assertLess(len(outputs), 13)
+
+    def test_different_template(self):
+        first = self.build_shard(1, 2)
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        second = self.build_shard(2, 2)
+        with self.assertRaisesRegex(ValueError, "different template"):
+            validate_shards([first, second])
+
+    def test_modified_output(self):
+        shard_dir = self.build_shard(1, 1)
+        write_file(os.path.join(shard_public_dir(shard_dir), "css", "site.css"), "tampered")
+        with self.assertRaisesRegex(ValueError, "does not match"):
+            validate_shards([shard_dir])
+
+    def test_output_missing_from_manifest(self):
+        shard_dir = self.build_shard(1, 1)
+        manifest_path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+        with open(manifest_path) as f:
+            data = json.load(f)
+        del data["outputs"]["css/site.css"]
+        with open(manifest_path, "w") as f:
+            json.dump(data, f)
+        with self.assertRaisesRegex(ValueError, "do not add up"):
+            validate_shards([shard_dir])
+
+
+if __name__ == "__main__":
+    unittest.main()
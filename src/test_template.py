@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+from htmlnode import LeafNode, ParentNode, RawNode
+from template import Template, TemplateCache
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parse(self):
+        template = Template.parse("<title>{{ Title }}</title>{{Content}}!")
+        self.assertListEqual(template.literals, ["<title>", "</title>", "!"])
+        self.assertListEqual(template.names, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template.parse("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Title }}</p>")
+        body = ParentNode("div", [LeafNode("b", "hi")])
+        actual = template.render({"Title": "Home", "Content": body})
+        self.assertEqual(actual, "<h1>Home</h1><div><b>hi</b></div><p>Home</p>")
+
+    def test_text_values_are_escaped(self):
+        template = Template.parse("<title>{{ Title }}</title>{{ Content }}")
+        context = {"Title": "Fish & <Chips>", "Content": RawNode("<p>a &amp; b</p>")}
+        expected = "<title>Fish &amp; &lt;Chips&gt;</title><p>a &amp; b</p>"
+        self.assertEqual(template.render(context), expected)
+        stream = StringIO()
+        template.write(stream, context)
+        self.assertEqual(stream.getvalue(), expected)
+
+    def test_missing_placeholder_is_left_alone(self):
+        template = Template.parse("{{ Title }} by {{ Author }}")
+        self.assertEqual(template.render({"Title": "{{ Author }}"}), "{{ Author }} by {{ Author }}")
+
+    def test_write(self):
+        template = Template.parse("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        stream = StringIO()
+        template.write(stream, {"Title": "T", "Content": ParentNode("p", [LeafNode(None, "x")])})
+        self.assertEqual(stream.getvalue(), "<title>T</title><main><p>x</p></main>")
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "template.html")
+        self.write("{{ Title }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mtime_ns=None):
+        with open(self.path, "w") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_cached_until_changed(self):
+        cache = TemplateCache()
+        first = cache.get(self.path)
+        self.assertIs(cache.get(self.path), first)
+
+        self.write("{{ Title }}", mtime_ns=10**18)
+        self.assertIs(cache.get(self.path), first)
+
+        self.write("<b>{{ Title }}</b>", mtime_ns=2 * 10**18)
+        second = cache.get(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render({"Title": "x"}), "<b>x</b>")
+
+
+if __name__ == "__main__":
+    unittest.main()
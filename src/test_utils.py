@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 from textnode import TextNode, TextType
 from utils import *
 
@@ -110,6 +111,25 @@ class TestUtils(unittest.TestCase):
         actual = split_nodes_image(actual)
         self.assertListEqual(actual, expected)
 
+    def test_split_nodes_link_dense(self):
+        text = " ".join(f"[link {i}](/pages/{i})" for i in range(10000))
+        actual = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(actual), 19999)
+        self.assertEqual(actual[-1], TextNode("link 9999", TextType.LINK, "/pages/9999"))
+
+        text = text.replace("[", "![")
+        actual = split_nodes_image([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(actual), 19999)
+        self.assertEqual(actual[0], TextNode("link 0", TextType.IMAGE, "/pages/0"))
+
+    def test_split_nodes_link_repeated(self):
+        node = TextNode("[a](b) and [a](b)", TextType.TEXT)
+        self.assertListEqual(split_nodes_link([node]), [
+            TextNode("a", TextType.LINK, "b"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "b"),
+        ])
+
     def test_extract_markdown_images(self):
         text = "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif) and ![obi wan](https://i.imgur.com/fJRm4Vk.jpeg)"
         actual = extract_markdown_images(text)
@@ -139,6 +159,23 @@ class TestUtils(unittest.TestCase):
         ]
         self.assertListEqual(actual, expected)
     
+    def test_text_to_textnodes_nested_delimiters_are_literal(self):
+        actual = text_to_textnodes("**a *b* `c`** and *[x](y)* then [x](y) [x](y)")
+        expected = [
+            TextNode("a *b* `c`", TextType.BOLD),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("[x](y)", TextType.ITALIC),
+            TextNode(" then ", TextType.TEXT),
+            TextNode("x", TextType.LINK, "y"),
+            TextNode(" ", TextType.TEXT),
+            TextNode("x", TextType.LINK, "y"),
+        ]
+        self.assertListEqual(actual, expected)
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        for text in ["**bold", "*italic", "`code", "*a **b** c*", "`a*b*c`"]:
+            self.assertRaises(Exception, text_to_textnodes, text)
+
     def test_markdown_to_blocks(self):
         markdown = """# This is a heading
 
@@ -179,6 +216,64 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_markdown_to_blocks_fenced_code(self):
+        md = """Intro
+
+```
+first
+
+second
+```
+after the fence
+
+* list"""
+        blocks = markdown_to_blocks(md)
+        self.assertListEqual(
+            blocks,
+            ["Intro", "```\nfirst\n\nsecond\n```\nafter the fence", "* list"],
+        )
+
+    def test_markdown_to_blocks_inline_code_is_not_a_fence(self):
+        md = "```x``` is inline code\n\n# Heading\n\n- a\n- b"
+        self.assertListEqual(
+            markdown_to_blocks(md),
+            ["```x``` is inline code", "# Heading", "- a\n- b"],
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><p><code>x</code> is inline code</p><h1>Heading</h1><ul><li>a</li><li>b</li></ul></div>",
+        )
+
+    def test_markdown_to_blocks_unclosed_fence(self):
+        md = "# Title\n\n```python\ncode\n\nmore text\n\n- a"
+        self.assertListEqual(
+            list(iter_numbered_blocks(md.split("\n"))),
+            [(1, "# Title"), (3, "```python\ncode"), (6, "more text"), (8, "- a")],
+        )
+
+    def test_iter_markdown_blocks_from_lines(self):
+        lines = iter(["# Title\n", "\n", "```\n", "a\n", "\n", "\n", "b```\n", "\n", "\n", "\n", "text\n"])
+        self.assertListEqual(
+            list(iter_markdown_blocks(lines)),
+            ["# Title", "```\na\n\n\nb```", "text"],
+        )
+
+    def test_iter_numbered_blocks(self):
+        lines = ["# Title", "", "", "para", "graph", "", "```", "a", "", "b```", "", "- item"]
+        self.assertListEqual(
+            list(iter_numbered_blocks(lines)),
+            [(1, "# Title"), (4, "para\ngraph"), (7, "```\na\n\nb```"), (12, "- item")],
+        )
+
+    def test_stream_markdown_to_html_node(self):
+        md = "# Title\n\n```\ncode\n\nmore\n```\n\ntext *here*\n"
+        node = stream_markdown_to_html_node(StringIO(md))
+        self.assertEqual(
+            node.to_html(),
+            "<div><h1>Title</h1><pre><code>code\n\nmore\n</code></pre><p>text <i>here</i></p></div>",
+        )
+        self.assertEqual(extract_title_from_lines(StringIO(md)), "Title")
+
     def test_block_to_block_type_heading(self):
         blocks = ["# head", "## head", "### head",
                   "#### head", "##### head", "###### head"]
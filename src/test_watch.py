@@ -0,0 +1,142 @@
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from testutil import TEMPLATE, write_file
+from watch import InotifyWatcher, PollingWatcher, SiteState
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestSiteState(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.path = lambda *parts: os.path.join(self.root, *parts)
+        write_file(self.path("template.html"), TEMPLATE)
+        write_file(self.path("content", "index.md"), "# Home\n\nhello")
+        write_file(self.path("content", "blog", "post.md"), "# Post\n\ntext")
+        write_file(self.path("static", "index.css"), "body {}")
+        self.state = SiteState(self.path("content"), self.path("static"),
+                               self.path("template.html"), self.path("public"))
+        self.state.build_all()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_all(self):
+        self.assertEqual(read_file(self.path("public", "blog", "post.html")),
+                         "<title>Post</title><div><h1>Post</h1><p>text</p></div>")
+        self.assertEqual(read_file(self.path("public", "index.css")), "body {}")
+
+    def test_edit_one_page(self):
+        write_file(self.path("content", "index.md"), "# Home\n\nchanged")
+        outputs = self.state.handle_changes([self.path("content", "index.md")])
+        self.assertListEqual(outputs, [self.path("public", "index.html")])
+        self.assertIn("changed", read_file(self.path("public", "index.html")))
+
+    def test_template_change_reuses_parsed_pages(self):
+        parse_count = self.state.parse_count
+        write_file(self.path("template.html"), "<h1>{{ Title }}</h1>{{ Content }}")
+        outputs = self.state.handle_changes([self.path("template.html")])
+        self.assertEqual(len(outputs), 2)
+        self.assertEqual(self.state.parse_count, parse_count)
+        self.assertTrue(read_file(self.path("public", "index.html")).startswith("<h1>Home</h1>"))
+
+    def test_removed_page_and_static(self):
+        os.remove(self.path("content", "blog", "post.md"))
+        os.remove(self.path("static", "index.css"))
+        outputs = self.state.handle_changes([self.path("content", "blog", "post.md"),
+                                             self.path("static", "index.css")])
+        self.assertEqual(len(outputs), 2)
+        self.assertFalse(os.path.exists(self.path("public", "blog", "post.html")))
+        self.assertFalse(os.path.exists(self.path("public", "index.css")))
+
+    def test_broken_page_does_not_stop_the_build(self):
+        write_file(self.path("content", "index.md"), "no title")
+        with redirect_stdout(StringIO()) as out:
+            outputs = self.state.handle_changes([self.path("content", "index.md")])
+        self.assertListEqual(outputs, [])
+        self.assertIn("Failed to generate", out.getvalue())
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(os.path.join(self.content, "index.md"), "# a")
+        write_file(self.template, "x")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_watcher(self, watcher):
+        try:
+            new_dir = os.path.join(self.content, "new")
+            os.mkdir(new_dir)
+            self.assertIn(new_dir, watcher.wait(timeout=2))
+            time.sleep(0.01)
+            write_file(os.path.join(new_dir, "page.md"), "# b")
+            write_file(self.template, "y")
+            write_file(os.path.join(self.tmp.name, "unrelated.txt"), "z")
+            changed = set()
+            deadline = time.monotonic() + 2
+            while len(changed) < 2 and time.monotonic() < deadline:
+                changed |= watcher.wait(timeout=0.2)
+            self.assertIn(os.path.join(new_dir, "page.md"), changed)
+            self.assertIn(self.template, changed)
+            self.assertNotIn(os.path.join(self.tmp.name, "unrelated.txt"), changed)
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        # polling only sees files, so the new directory shows up as its file
+        watcher = PollingWatcher([self.content, self.template], interval=0.01)
+        write_file(os.path.join(self.content, "index.md"), "# changed")
+        self.assertSetEqual(watcher.wait(timeout=2), {os.path.join(self.content, "index.md")})
+        self.assertSetEqual(watcher.wait(timeout=0), set())
+        watcher.close()
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content, self.template])
+        except (OSError, AttributeError, TypeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+    def test_inotify_watcher_follows_moved_directories(self):
+        old_dir = os.path.join(self.content, "old", "sub")
+        write_file(os.path.join(old_dir, "page.md"), "# a")
+        try:
+            watcher = InotifyWatcher([self.content, self.template])
+        except (OSError, AttributeError, TypeError):
+            self.skipTest("inotify is not available")
+        try:
+            new_dir = os.path.join(self.content, "new")
+            os.rename(os.path.join(self.content, "old"), new_dir)
+            self.assertSetEqual(watcher.wait(timeout=2),
+                                {os.path.join(self.content, "old"), new_dir})
+            outside = os.path.join(self.tmp.name, "outside")
+            os.rename(new_dir, outside)
+            self.assertSetEqual(watcher.wait(timeout=2), {new_dir})
+
+            os.rename(outside, new_dir)
+            self.assertSetEqual(watcher.wait(timeout=2), {new_dir})
+            write_file(os.path.join(new_dir, "sub", "page.md"), "# b")
+            self.assertSetEqual(watcher.wait(timeout=2), {os.path.join(new_dir, "sub", "page.md")})
+            os.rename(new_dir, outside)
+            watcher.wait(timeout=2)
+            write_file(os.path.join(outside, "sub", "page.md"), "# c")
+            self.assertSetEqual(watcher.wait(timeout=0.2), set())
+        finally:
+            watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
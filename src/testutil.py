@@ -0,0 +1,19 @@
+import os
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+
+
+def read_tree(root):
+    files = {}
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            with open(path) as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
@@ -64,19 +64,8 @@ def split_nodes_image(old_nodes):
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        
-        text = node.text
-        extracted_images = extract_markdown_images(text)
-        for image_alt, image_link in extracted_images:
-            sections = text.split(f"![{image_alt}]({image_link})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(image_alt, TextType.IMAGE, image_link))
-            text = sections[1]
-        if text != "":
-            new_nodes.append(TextNode(text, TextType.TEXT))
+
+        _append_matches(new_nodes, IMAGE_RE, TextType.IMAGE, node.text, 0, len(node.text))
 
     return new_nodes
 
@@ -85,81 +74,187 @@ def split_nodes_link(old_nodes):
     new_nodes = []
     for node in old_nodes:
         if not isinstance(node, TextNode):
-            raise Exception
+            raise Exception("node must be a TextNode")
         
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
 
-        text = node.text
-        extracted_links = extract_markdown_links(text)
-
-        for link_text, link_url in extracted_links:
-            sections = text.split(f"[{link_text}]({link_url})")
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link_text, TextType.LINK, link_url))
-            text = sections[1]
-        if text != "":
-            new_nodes.append(TextNode(text, TextType.TEXT))
+        _append_matches(new_nodes, LINK_RE, TextType.LINK, node.text, 0, len(node.text))
     return new_nodes
 
+
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_DELIMITER_RE = re.compile(r"\*\*|\*|`")
+DELIMITER_TEXT_TYPES = {
+    "**": TextType.BOLD,
+    "*": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 def extract_markdown_images(text):
-    image_regex = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(image_regex, text)
+    return IMAGE_RE.findall(text)
 
 
 def extract_markdown_links(text):
-    link_regex = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(link_regex, text)
+    return LINK_RE.findall(text)
+
+
+def _append_text(nodes, text, start, end):
+    if start < end:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+
+
+def _append_matches(nodes, regex, text_type, text, start, end, append_gap=_append_text):
+    # Match positions drive the slicing, so each string is scanned once.
+    for match in regex.finditer(text, start, end):
+        append_gap(nodes, text, start, match.start())
+        nodes.append(TextNode(match[1], text_type, match[2]))
+        start = match.end()
+    append_gap(nodes, text, start, end)
+
+
+def _append_links(nodes, text, start, end):
+    _append_matches(nodes, LINK_RE, TextType.LINK, text, start, end)
+
+
+def _append_plain_text(nodes, text, start, end):
+    if text.find("[", start, end) == -1:
+        _append_text(nodes, text, start, end)
+        return
+    _append_matches(nodes, IMAGE_RE, TextType.IMAGE, text, start, end, _append_links)
 
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # One scan over the delimiters, mirroring the old split order: ** pairs
+    # are matched first, then * inside the gaps, then ` inside those gaps.
+    # Images and links are only looked for in the remaining plain text.
+    nodes = []
+    open_delimiter = None
+    start = 0
+    for match in INLINE_DELIMITER_RE.finditer(text):
+        delimiter = match[0]
+        if open_delimiter is None:
+            _append_plain_text(nodes, text, start, match.start())
+            open_delimiter = delimiter
+            start = match.end()
+            continue
+        if delimiter == open_delimiter:
+            if match.start() > start:
+                nodes.append(TextNode(text[start:match.start()], DELIMITER_TEXT_TYPES[delimiter]))
+            open_delimiter = None
+            start = match.end()
+            continue
+        if open_delimiter == "**" or (open_delimiter == "*" and delimiter == "`"):
+            continue
+        raise Exception("invalid text: need closing delimiter")
+
+    if open_delimiter is not None:
+        raise Exception("invalid text: need closing delimiter")
+    _append_plain_text(nodes, text, start, len(text))
     return nodes
 
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+FENCE_OPEN_RE = re.compile(r"```[^`]*")
+
+
+def iter_numbered_blocks(lines):
+    # Blocks are separated by empty lines, except inside a fenced code
+    # block, which runs from a ``` line (with an optional info string) until
+    # a line ending with ```. Only the current block is held in memory, so
+    # lines can come straight from a file.
+    # Yields (number of the block's first line, block), counting from 1.
+    block_lines = []
+    first_line = 1
+    in_fence = False
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if in_fence:
+            block_lines.append(line)
+            in_fence = not line.rstrip().endswith("```")
+            continue
+        if line == "":
+            block = "\n".join(block_lines).strip()
+            block_lines = []
+            if block != "":
+                yield first_line, block
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if len(block_lines) == 0:
+            first_line = line_number
+            in_fence = FENCE_OPEN_RE.fullmatch(line.strip()) is not None
+        block_lines.append(line)
 
+    if in_fence:
+        # A fence that never closes is not code, so its lines split on
+        # empty lines like any other text.
+        yield from _split_on_empty_lines(block_lines, first_line)
+        return
+    block = "\n".join(block_lines).strip()
+    if block != "":
+        yield first_line, block
 
-def block_to_block_type(block):
-    heading_regex = r"^#{1,6} .*"
-    code_regex = r"^`{3}(.|\n)*`{3}$"
-    quote_regex = r"^>.*"
-    unordered_list_regex = r"^[\-\*] .*"
-    lines = block.split("\n")
-    
-    if re.fullmatch(heading_regex, block):
-        return BlockType.HEADING
-    
-    if re.fullmatch(code_regex, block):
-        return BlockType.CODE
 
-    if all(re.search(quote_regex, line) for line in lines):
-        return BlockType.QUOTE
-    
-    if all([line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)]):
-        return BlockType.ORDERED_LIST
-    
-    if all(re.search(unordered_list_regex, line) for line in lines):
-        return BlockType.UNORDERED_LIST
-    
-    ## Need ordered list regex
+def _split_on_empty_lines(lines, first_line):
+    start = 0
+    for i, line in enumerate(lines + [""]):
+        if line != "":
+            continue
+        block = "\n".join(lines[start:i]).strip()
+        if block != "":
+            yield first_line + start, block
+        start = i + 1
+
+
+def iter_markdown_blocks(lines):
+    for _, block in iter_numbered_blocks(lines):
+        yield block
+
+
+def markdown_to_blocks(markdown):
+    return list(iter_markdown_blocks(markdown.split("\n")))
+
+
+HEADING_RE = re.compile(r"#{1,6} ")
+
+
+def _is_heading(block):
+    return "\n" not in block and HEADING_RE.match(block) is not None
+
+
+def _is_code(block):
+    return len(block) >= 6 and block.startswith("```") and block.endswith("```")
+
+
+def _is_quote(block):
+    return all(line.startswith(">") for line in block.split("\n"))
+
+
+def _is_ordered_list(block):
+    return all(line.startswith(f"{i}. ") for i, line in enumerate(block.split("\n"), 1))
+
+
+def _is_unordered_list(block):
+    return all(line[:2] in ("- ", "* ") for line in block.split("\n"))
+
+
+# Every block type is decided by its first character, so each block is
+# checked against at most one rule.
+BLOCK_RULES = {
+    "#": (_is_heading, BlockType.HEADING),
+    "`": (_is_code, BlockType.CODE),
+    ">": (_is_quote, BlockType.QUOTE),
+    "1": (_is_ordered_list, BlockType.ORDERED_LIST),
+    "-": (_is_unordered_list, BlockType.UNORDERED_LIST),
+    "*": (_is_unordered_list, BlockType.UNORDERED_LIST),
+}
+
+
+def block_to_block_type(block):
+    rule = BLOCK_RULES.get(block[:1])
+    if rule is not None and rule[0](block):
+        return rule[1]
     return BlockType.PARAGRAPH
 
 
@@ -168,63 +263,75 @@ def text_to_children(text):
     html_nodes = [text_node_to_html_node(node) for node in text_nodes]
     return html_nodes
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    block_children = []
-    for block in blocks:
+def block_to_html_node(block, block_type=None):
+    if block_type is None:
         block_type = block_to_block_type(block)
-        node = None
-        match block_type:
-            case BlockType.HEADING:
-                searched = re.search(r"^#{1,6} ", block)
-                if searched is None:
-                    raise Exception("Invalid heading")
-                searched = searched[0]
-                level = len(searched) - 1
-                tag = f"h{level}"
-                text = block[level + 1: ]
-                children = text_to_children(text)
-                node = ParentNode(tag, children)
-            case BlockType.PARAGRAPH:
-                lines = block.split("\n")
-                paragraph = " ".join(lines)
-                children = text_to_children(paragraph)
-                node = ParentNode("p", children)
-            case BlockType.CODE:
-                if not block.startswith("```") or not block.endswith("```"):
-                    raise ValueError("Invalid code block")
-                text = block[4:-3]
-                children = text_to_children(text)
-                node = ParentNode("pre", [ParentNode("code", children)])
-            case BlockType.UNORDERED_LIST:
-                item_strings = [line[2:] for line in block.split("\n")]
-                item_nodes = []
-                for item in item_strings:
-                    item_children_nodes = text_to_children(item)
-                    item_nodes.append(ParentNode("li", item_children_nodes))
-                node = ParentNode("ul", children=item_nodes)
-            case BlockType.ORDERED_LIST:
-                item_strings = [line[3:] for line in block.split("\n")]
-                item_nodes = []
-                for item in item_strings:
-                    item_children_nodes = text_to_children(item)
-                    item_nodes.append(ParentNode("li", item_children_nodes))
-                node = ParentNode("ol", children=item_nodes)
-            case BlockType.QUOTE:
-                item_strings = [line.lstrip(">").strip() for line in block.split("\n")]
-                content = " ".join(item_strings)
-                children = text_to_children(content)
-                node = ParentNode("blockquote", children)
-            case _:
-                raise Exception(f"unknown BlockType {block_type}")
-        block_children.append(node)
-    
-    return ParentNode("div", block_children)
+    node = None
+    match block_type:
+        case BlockType.HEADING:
+            searched = HEADING_RE.match(block)
+            if searched is None:
+                raise Exception("Invalid heading")
+            level = searched.end() - 1
+            tag = f"h{level}"
+            text = block[level + 1: ]
+            children = text_to_children(text)
+            node = ParentNode(tag, children)
+        case BlockType.PARAGRAPH:
+            lines = block.split("\n")
+            paragraph = " ".join(lines)
+            children = text_to_children(paragraph)
+            node = ParentNode("p", children)
+        case BlockType.CODE:
+            if not block.startswith("```") or not block.endswith("```"):
+                raise ValueError("Invalid code block")
+            text = block[4:-3]
+            children = text_to_children(text)
+            node = ParentNode("pre", [ParentNode("code", children)])
+        case BlockType.UNORDERED_LIST:
+            item_strings = [line[2:] for line in block.split("\n")]
+            item_nodes = []
+            for item in item_strings:
+                item_children_nodes = text_to_children(item)
+                item_nodes.append(ParentNode("li", item_children_nodes))
+            node = ParentNode("ul", children=item_nodes)
+        case BlockType.ORDERED_LIST:
+            item_strings = [line[3:] for line in block.split("\n")]
+            item_nodes = []
+            for item in item_strings:
+                item_children_nodes = text_to_children(item)
+                item_nodes.append(ParentNode("li", item_children_nodes))
+            node = ParentNode("ol", children=item_nodes)
+        case BlockType.QUOTE:
+            item_strings = [line.lstrip(">").strip() for line in block.split("\n")]
+            content = " ".join(item_strings)
+            children = text_to_children(content)
+            node = ParentNode("blockquote", children)
+        case _:
+            raise Exception(f"unknown BlockType {block_type}")
+    return node
+
+
+def markdown_to_html_node(markdown, block_cache=None):
+    blocks = markdown_to_blocks(markdown)
+    to_node = block_to_html_node if block_cache is None else block_cache.node
+    return ParentNode("div", [to_node(block) for block in blocks])
+
+
+def stream_markdown_to_html_node(lines, block_cache=None):
+    # The children are built lazily while the node is serialized, so the
+    # returned node can only be written once.
+    blocks = iter_markdown_blocks(lines)
+    to_node = block_to_html_node if block_cache is None else block_cache.node
+    return ParentNode("div", (to_node(block) for block in blocks))
 
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
+    return extract_title_from_lines(markdown.split("\n"))
+
+
+def extract_title_from_lines(lines):
     for line in lines:
         if line.startswith("# "):
             return line[2:].strip()
-    raise Exception("markdown has no h1 header")
\ No newline at end of file
+    raise Exception("markdown has no h1 header")
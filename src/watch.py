@@ -0,0 +1,312 @@
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import struct
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from copy_file import copy_from_source_to_dest, fast_copy
+from document import parse_document
+from generate import find_pages
+from output import open_output, sweep_temp_files
+from template import load_template
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_under(path, root):
+    return path == root or path.startswith(root + os.sep)
+
+
+class SiteState:
+    def __init__(self, content_dir, static_dir, template_path, public_dir):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.public_dir = os.path.normpath(public_dir)
+        # source path -> {"dest", "title", "node"}
+        self.pages = {}
+        self.parse_count = 0
+
+    def page_dest(self, content_path):
+        rel_path = os.path.relpath(content_path, self.content_dir)
+        return os.path.join(self.public_dir, rel_path[:-3] + ".html")
+
+    def static_dest(self, static_path):
+        return os.path.join(self.public_dir, os.path.relpath(static_path, self.static_dir))
+
+    def build_all(self):
+        sweep_temp_files(self.public_dir)
+        copy_from_source_to_dest(self.static_dir, self.public_dir)
+        outputs = []
+        for content_path, _ in find_pages(self.content_dir, self.public_dir):
+            outputs.extend(self.update_page(os.path.normpath(content_path)))
+        return outputs
+
+    def load_page(self, content_path):
+        with open(content_path, "r") as f:
+            document = parse_document(f)
+        self.parse_count += 1
+        self.pages[content_path] = {
+            "dest": self.page_dest(content_path),
+            "title": document.title,
+            "node": document.node,
+        }
+
+    def render_page(self, content_path):
+        page = self.pages[content_path]
+        template = load_template(self.template_path)
+        with open_output(page["dest"]) as f:
+            template.write(f, {"Title": page["title"], "Content": page["node"]})
+        return page["dest"]
+
+    def update_page(self, content_path):
+        try:
+            self.load_page(content_path)
+            return [self.render_page(content_path)]
+        except Exception as e:
+            print(f"Failed to generate {content_path}: {e}")
+            return []
+
+    def remove_pages(self, path):
+        removed = []
+        for content_path in [p for p in self.pages if is_under(p, path)]:
+            dest_path = self.pages.pop(content_path)["dest"]
+            if os.path.isfile(dest_path):
+                os.remove(dest_path)
+            removed.append(dest_path)
+        return removed
+
+    def handle_changes(self, paths):
+        outputs = []
+        template_changed = False
+        for path in sorted(os.path.normpath(p) for p in paths):
+            if path == self.template_path:
+                template_changed = True
+            elif is_under(path, self.content_dir):
+                outputs.extend(self.handle_content_change(path))
+            elif is_under(path, self.static_dir):
+                outputs.extend(self.handle_static_change(path))
+        if template_changed and os.path.isfile(self.template_path):
+            # Only the template changed for these pages, so the cached
+            # HTMLNode bodies are rendered again without re-parsing.
+            for content_path in self.pages:
+                try:
+                    outputs.append(self.render_page(content_path))
+                except Exception as e:
+                    print(f"Failed to render {content_path}: {e}")
+        return sorted(set(outputs))
+
+    def handle_content_change(self, path):
+        if os.path.isdir(path):
+            outputs = []
+            for content_path, _ in find_pages(path, self.public_dir):
+                outputs.extend(self.update_page(os.path.normpath(content_path)))
+            return outputs
+        if os.path.isfile(path):
+            return self.update_page(path) if path.endswith(".md") else []
+        return self.remove_pages(path)
+
+    def handle_static_change(self, path):
+        dest_path = self.static_dest(path)
+        if os.path.isdir(path):
+            copy_from_source_to_dest(path, dest_path)
+        elif os.path.isfile(path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            fast_copy(path, dest_path)
+        elif os.path.isdir(dest_path):
+            shutil.rmtree(dest_path)
+        elif os.path.exists(dest_path):
+            os.remove(dest_path)
+        else:
+            return []
+        return [dest_path]
+
+
+class PollingWatcher:
+    def __init__(self, paths, interval=0.5):
+        self.paths = [os.path.normpath(p) for p in paths]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for root in self.paths:
+            if os.path.isfile(root):
+                stat = os.stat(root)
+                snapshot[root] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for dir_path, _, file_names in os.walk(root):
+                for file_name in file_names:
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if len(changed) > 0:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, paths, settle=0.05):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.settle = settle
+        self.watches = {}
+        paths = [os.path.normpath(p) for p in paths]
+        for path in paths:
+            if os.path.isdir(path):
+                self.add_tree(path)
+        # Files such as template.html are watched through their directory,
+        # since editors often replace them with a rename. Other entries in
+        # those directories are ignored.
+        self.files = {p for p in paths if not os.path.isdir(p)}
+        self.file_dirs = set()
+        for path in self.files:
+            dir_path = os.path.dirname(path) or "."
+            if dir_path not in self.watches.values():
+                self.add_watch(dir_path)
+                self.file_dirs.add(dir_path)
+
+    def add_watch(self, dir_path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+        self.watches[wd] = dir_path
+
+    def add_tree(self, root):
+        for dir_path, _, _ in os.walk(root):
+            self.add_watch(dir_path)
+
+    def remove_tree(self, root):
+        # Watches follow the directory, not its path, so a moved directory's
+        # watches are dropped and, if it moved within the tree, added again
+        # under the new path.
+        for wd, dir_path in list(self.watches.items()):
+            if is_under(dir_path, root):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def read_events(self):
+        changed = set()
+        data = os.read(self.fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.watches.values())
+                changed.update(self.files)
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            dir_path = self.watches.get(wd)
+            if dir_path is None or name == "":
+                continue
+            path = os.path.normpath(os.path.join(dir_path, name))
+            if dir_path in self.file_dirs and path not in self.files:
+                continue
+            if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                self.remove_tree(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+            changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self.read_events()
+        # Editors usually write in several steps; collect them into one batch.
+        while select.select([self.fd], [], [], self.settle)[0]:
+            changed.update(self.read_events())
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(paths, poll=False, interval=0.5):
+    if not poll:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(paths, interval)
+
+
+def serve(directory, port):
+    handler = partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {directory} on http://localhost:{port}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site, then rebuild affected outputs on every change")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=0.5, help="polling interval in seconds")
+    parser.add_argument("--port", type=int, default=8888, help="serve ./public on this port (0 to disable)")
+    args = parser.parse_args(argv)
+
+    state = SiteState("./content", "./static", "./template.html", "./public")
+    state.build_all()
+    watcher = make_watcher([state.content_dir, state.static_dir, state.template_path],
+                           args.poll, args.interval)
+    print(f"Watching for changes with {type(watcher).__name__}")
+    if args.port != 0:
+        serve(state.public_dir, args.port)
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            outputs = state.handle_changes(changed)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {len(outputs)} output(s) in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()